@@ -0,0 +1,205 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+WARMUP = 1
+TRIALS = 5
+PERCENTILES = (50, 90, 99)
+
+# Statistics
+def percentile(sorted_values, pct):
+    """
+    Percentile with linear interpolation between the closest ranks.
+    :param sorted_values: Values sorted in ascending order
+    :param pct: Percentile between 0 and 100
+    :return: Interpolated value
+    """
+    if not sorted_values:
+        raise ValueError("No values to compute a percentile of.")
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+def peak_rss():
+    """
+    Peak resident set size of this process so far.
+    :return: Bytes, or None where the resource module is unavailable
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024  # Linux reports KB
+
+# Measurement
+def measure(func, setup=None, warmup=WARMUP, trials=TRIALS, trace_memory=True):
+    """
+    Times func over repeated trials after a few warmup runs.
+    setup runs before every call, outside the timed region, and returns the arguments for func.
+    Peak Python allocations are taken from one extra traced run so tracing does not skew the timings.
+    :param func: Callable to benchmark
+    :param setup: Optional callable returning a tuple of arguments for func
+    :param warmup: Number of untimed runs
+    :param trials: Number of timed runs
+    :param trace_memory: Whether to record peak allocations with tracemalloc
+    :return: Dictionary of timing and memory statistics
+    """
+    if trials < 1:
+        raise ValueError("At least one trial is required.")
+
+    for _ in range(warmup):
+        func(*(setup() if setup else ()))
+
+    wall_times = []
+    cpu_times = []
+    for _ in range(trials):
+        args = setup() if setup else ()
+        cpu_start = time.process_time_ns()
+        start = time.perf_counter_ns()
+        func(*args)
+        wall_times.append(time.perf_counter_ns() - start)
+        cpu_times.append(time.process_time_ns() - cpu_start)
+
+    peak_alloc = None
+    if trace_memory:
+        args = setup() if setup else ()
+        tracemalloc.start()
+        try:
+            func(*args)
+            peak_alloc = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    wall_times.sort()
+    stats = {
+        'trials': trials,
+        'min_ns': wall_times[0],
+        'max_ns': wall_times[-1],
+        'mean_ns': statistics.fmean(wall_times),
+        'stdev_ns': statistics.stdev(wall_times) if trials > 1 else 0.0,
+    }
+    for pct in PERCENTILES:
+        stats[f'p{pct}_ns'] = percentile(wall_times, pct)
+    # CPU time over wall time for the same runs (can exceed 100% with worker threads)
+    stats['cpu_percent'] = 100 * sum(cpu_times) / max(sum(wall_times), 1)
+    stats['peak_alloc_bytes'] = peak_alloc
+    stats['peak_rss_bytes'] = peak_rss()
+    return stats
+
+def run(name, func, params=None, setup=None, warmup=WARMUP, trials=TRIALS, trace_memory=True):
+    """
+    Measures func and returns a flat result record.
+    :param name: Benchmark name
+    :param func: Callable to benchmark
+    :param params: Dictionary of parameters describing this case (e.g. size)
+    :return: Dictionary with the name, the parameters and the statistics
+    """
+    record = {'name': name}
+    record.update(params or {})
+    record.update(measure(func, setup, warmup, trials, trace_memory))
+    return record
+
+# Output
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def _columns(results):
+    columns = []
+    for record in results:
+        for column in record:
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+def write_json(results, path):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def write_csv(results, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=_columns(results))
+        writer.writeheader()
+        writer.writerows(results)
+
+def print_table(results, columns):
+    widths = [max(len(column), *(len(_format(record.get(column))) for record in results)) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for record in results:
+        print('  '.join(_format(record.get(column)).rjust(width) for column, width in zip(columns, widths)))
+
+def _format(value):
+    if isinstance(value, float):
+        return f'{value:.3f}'
+    return '-' if value is None else str(value)
+
+def plot(results, x, y, path, group='name', xlabel=None, ylabel=None, title=None):
+    """
+    Saves a line plot of y against x with one line per group. matplotlib is optional and
+    always used headless, so this never blocks.
+    :return: True if the plot was written
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping plot.")
+        return False
+
+    lines = {}
+    for record in results:
+        if record.get(y) is not None:
+            lines.setdefault(record[group], []).append((record[x], record[y]))
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for label, points in lines.items():
+        points.sort()
+        ax.plot([p[0] for p in points], [p[1] for p in points], label=label, marker='o')
+    ax.set_xlabel(xlabel or x)
+    ax.set_ylabel(ylabel or y)
+    if title:
+        ax.set_title(title)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return True
+
+# Command line
+def parse_args(description, argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--warmup', type=int, default=WARMUP, help="untimed runs before measuring")
+    parser.add_argument('--trials', type=int, default=TRIALS, help="timed runs per case")
+    parser.add_argument('--json', help="write results to this JSON file")
+    parser.add_argument('--csv', help="write results to this CSV file")
+    parser.add_argument('--plot', help="save a plot to this image file (needs matplotlib)")
+    return parser.parse_args(argv)
+
+def report(results, args, columns, x, y, **plot_options):
+    """
+    Prints the results and writes whichever outputs were requested on the command line.
+    """
+    print_table(results, columns)
+    if args.json:
+        write_json(results, args.json)
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.plot:
+        plot(results, x, y, args.plot, **plot_options)
@@ -1,120 +1,411 @@
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 from Crypto.Util.Padding import pad, unpad
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import mmap
 import os
-import time
-import psutil
-import matplotlib.pyplot as plt
+import struct
+import sys
+import tempfile
 
 # Key generation
 def generate_key():
     return get_random_bytes(32)
 
-# Encryption
-def encrypt_file(input_file, output_file, key):
+# Chunk size used when streaming files through the cipher (must be a multiple of the AES block size)
+CHUNK_SIZE = 64 * 1024
+
+def _check_chunk_size(chunk_size):
+    if chunk_size <= 0 or chunk_size % AES.block_size != 0:
+        raise ValueError(f"Chunk size must be a positive multiple of {AES.block_size} bytes.")
+
+# Streaming encryption: reads fixed-size chunks and pads only the final one
+def encrypt_stream(fin, fout, key, chunk_size=CHUNK_SIZE):
 
     if len(key) != 32:
         raise ValueError("Key must be 32 bytes long for AES-256.")
+    _check_chunk_size(chunk_size)
 
     cipher = AES.new(key, AES.MODE_CBC)
-    
-    with open(input_file, 'rb') as f:
-        plaintext = f.read()
-    
-    ciphertext = cipher.encrypt(pad(plaintext, AES.block_size))
 
-    with open(output_file, 'wb') as f:
-        # Write the IV followed by the ciphertext
-        f.write(cipher.iv + ciphertext)
+    # Write the IV followed by the ciphertext
+    fout.write(cipher.iv)
+
+    chunk = fin.read(chunk_size)
+    while True:
+        next_chunk = fin.read(chunk_size)
+        if not next_chunk:
+            fout.write(cipher.encrypt(pad(chunk, AES.block_size)))
+            break
+        fout.write(cipher.encrypt(chunk))
+        chunk = next_chunk
+
+# Streaming decryption: holds back one chunk so the padding is only removed at the end
+def decrypt_stream(fin, fout, key, chunk_size=CHUNK_SIZE):
 
-# Decryption
-def decrypt_file(input_file, output_file, key):
-    
     if len(key) != 32:
         raise ValueError("Key must be 32 bytes long for AES-256.")
+    _check_chunk_size(chunk_size)
+
+    iv = fin.read(AES.block_size)  # First 16 bytes are the IV
+
+    try:
+        cipher = AES.new(key, AES.MODE_CBC, iv=iv)
+        chunk = fin.read(chunk_size)
+        while True:
+            next_chunk = fin.read(chunk_size)
+            if not next_chunk:
+                fout.write(unpad(cipher.decrypt(chunk), AES.block_size))
+                break
+            fout.write(cipher.decrypt(chunk))
+            chunk = next_chunk
+    except (ValueError, KeyError) as e:
+        raise ValueError("Decryption failed. Ensure the correct key is used.") from e
+
+# Segmented container format: each segment is encrypted on its own with a separate IV,
+# so segments can be processed in parallel and located without reading the whole file.
+#
+#   header   : magic | version | mode | segment size | plaintext size
+#   index    : one IV (CBC) or nonce (GCM) per segment
+#   segments : segment ciphertexts in order
+#
+# In CBC mode only the last segment is padded. In GCM mode nothing is padded and every
+# segment is followed by its 16-byte tag; the header and the segment number are
+# authenticated too, so tampering, reordering or a wrong key is caught segment by segment.
+CONTAINER_MAGIC = b'AES256SG'
+CONTAINER_VERSION = 1
+CONTAINER_CBC = 1
+CONTAINER_GCM = 2
+CONTAINER_HEADER = struct.Struct('>8sBBIQ')
+SEGMENT_SIZE = 1024 * 1024
+GCM_NONCE_SIZE = 12
+GCM_TAG_SIZE = 16
+
+_IV_SIZES = {CONTAINER_CBC: AES.block_size, CONTAINER_GCM: GCM_NONCE_SIZE}
+
+def _segment_count(plaintext_size, segment_size):
+    return max(1, -(-plaintext_size // segment_size))
+
+def _padded_size(size):
+    return (size // AES.block_size + 1) * AES.block_size
+
+# Size of a segment on disk
+def _segment_stride(mode, segment_size):
+    return segment_size + GCM_TAG_SIZE if mode == CONTAINER_GCM else segment_size
+
+# Associated data for a GCM segment: the container header plus the segment number
+def _segment_aad(raw_header, index):
+    return raw_header + struct.pack('>Q', index)
 
-    with open(input_file, 'rb') as f:
-        iv = f.read(16)  # First 16 bytes are the IV
-        ciphertext = f.read()
+# Reads the container header and IV index, or rewinds and returns None for legacy IV || ciphertext files
+def _read_header(fin):
+    raw = fin.read(CONTAINER_HEADER.size)
+    if len(raw) < CONTAINER_HEADER.size or raw[:len(CONTAINER_MAGIC)] != CONTAINER_MAGIC:
+        fin.seek(0)
+        return None
+
+    magic, version, mode, segment_size, plaintext_size = CONTAINER_HEADER.unpack(raw)
+    if version != CONTAINER_VERSION or mode not in _IV_SIZES:
+        raise ValueError("Unsupported container version or mode.")
+    if segment_size == 0 or segment_size % AES.block_size != 0:
+        raise ValueError("Corrupt container header.")
+
+    iv_size = _IV_SIZES[mode]
+    count = _segment_count(plaintext_size, segment_size)
+    index = fin.read(count * iv_size)
+    if len(index) != count * iv_size:
+        raise ValueError("Corrupt container header.")
+    ivs = [index[i:i + iv_size] for i in range(0, len(index), iv_size)]
+    return mode, segment_size, plaintext_size, ivs, raw
+
+def _encrypt_segment(key, mode, iv, data, last, aad):
+    if mode == CONTAINER_GCM:
+        cipher = AES.new(key, AES.MODE_GCM, nonce=iv, mac_len=GCM_TAG_SIZE)
+        cipher.update(aad)
+        ciphertext, tag = cipher.encrypt_and_digest(data)
+        return ciphertext + tag
 
     cipher = AES.new(key, AES.MODE_CBC, iv=iv)
+    return cipher.encrypt(pad(data, AES.block_size) if last else data)
 
+def _decrypt_segment(key, mode, iv, data, last, aad):
+    if mode == CONTAINER_GCM:
+        cipher = AES.new(key, AES.MODE_GCM, nonce=iv, mac_len=GCM_TAG_SIZE)
+        cipher.update(aad)
+        try:
+            return cipher.decrypt_and_verify(data[:-GCM_TAG_SIZE], data[-GCM_TAG_SIZE:])
+        except ValueError as e:
+            raise ValueError("Authentication failed. The file was modified or the key is wrong.") from e
+
+    cipher = AES.new(key, AES.MODE_CBC, iv=iv)
+    plaintext = cipher.decrypt(data)
+    if not last:
+        return plaintext
     try:
-        plaintext = unpad(cipher.decrypt(ciphertext), AES.block_size)
+        return unpad(plaintext, AES.block_size)
     except (ValueError, KeyError) as e:
         raise ValueError("Decryption failed. Ensure the correct key is used.") from e
 
-    with open(output_file, 'wb') as f:
-        f.write(plaintext)
+# Submits (function, args) jobs to the pool and writes their results in order,
+# keeping at most `window` segments in flight so memory stays bounded.
+# The first failing segment stops the run and cancels everything queued behind it.
+def _run_ordered(pool, jobs, fout, window):
+    pending = deque()
+    try:
+        for func, args in jobs:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= window:
+                fout.write(pending.popleft().result())
+        while pending:
+            fout.write(pending.popleft().result())
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+
+# Parallel encryption into the segmented container format (mode is CONTAINER_CBC or CONTAINER_GCM).
+# pycryptodome releases the GIL while encrypting, so a thread pool scales across cores.
+def encrypt_file_parallel(input_file, output_file, key, segment_size=SEGMENT_SIZE, workers=None,
+                          mode=CONTAINER_CBC):
+
+    if len(key) != 32:
+        raise ValueError("Key must be 32 bytes long for AES-256.")
+    if mode not in _IV_SIZES:
+        raise ValueError("Unsupported container mode.")
+    _check_chunk_size(segment_size)
+
+    workers = workers or os.cpu_count() or 1
+    plaintext_size = os.path.getsize(input_file)
+    count = _segment_count(plaintext_size, segment_size)
+    ivs = [get_random_bytes(_IV_SIZES[mode]) for _ in range(count)]
+    raw_header = CONTAINER_HEADER.pack(CONTAINER_MAGIC, CONTAINER_VERSION, mode, segment_size, plaintext_size)
+
+    with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        fout.write(raw_header)
+        fout.write(b''.join(ivs))
+
+        jobs = ((_encrypt_segment, (key, mode, ivs[i], fin.read(segment_size), i == count - 1,
+                                    _segment_aad(raw_header, i)))
+                for i in range(count))
+        _run_ordered(pool, jobs, fout, 2 * workers)
+
+# Authenticated encryption: segmented container with a GCM tag per segment
+def encrypt_file_gcm(input_file, output_file, key, segment_size=SEGMENT_SIZE, workers=None):
+    encrypt_file_parallel(input_file, output_file, key, segment_size, workers, mode=CONTAINER_GCM)
+
+def _decrypt_segments(fin, fout, key, header, workers):
+    mode, segment_size, plaintext_size, ivs, raw_header = header
+    count = len(ivs)
+    last_plaintext_size = plaintext_size - (count - 1) * segment_size
+    if mode == CONTAINER_GCM:
+        last_size = last_plaintext_size + GCM_TAG_SIZE
+    else:
+        last_size = _padded_size(last_plaintext_size)
+
+    def jobs():
+        for i, iv in enumerate(ivs):
+            last = i == count - 1
+            size = last_size if last else _segment_stride(mode, segment_size)
+            data = fin.read(size)
+            if len(data) != size:
+                raise ValueError("Container is truncated.")
+            yield _decrypt_segment, (key, mode, iv, data, last, _segment_aad(raw_header, i))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        _run_ordered(pool, jobs(), fout, 2 * workers)
+
+# Encryption
+def encrypt_file(input_file, output_file, key, chunk_size=CHUNK_SIZE):
+
+    if len(key) != 32:
+        raise ValueError("Key must be 32 bytes long for AES-256.")
+
+    with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+        encrypt_stream(fin, fout, key, chunk_size)
+
+# Zero-copy encryption: feeds memoryview slices of a memory-mapped input straight into
+# a preallocated, memory-mapped output, so no intermediate buffer is created per chunk
+def encrypt_file_mmap(input_file, output_file, key, chunk_size=CHUNK_SIZE):
+
+    if len(key) != 32:
+        raise ValueError("Key must be 32 bytes long for AES-256.")
+    _check_chunk_size(chunk_size)
+
+    plaintext_size = os.path.getsize(input_file)
+    if plaintext_size == 0:
+        # An empty file cannot be memory-mapped; it is a single padding block anyway
+        encrypt_file(input_file, output_file, key, chunk_size)
+        return
+
+    aligned_size = plaintext_size - plaintext_size % AES.block_size
+    header_size = AES.block_size
+    cipher = AES.new(key, AES.MODE_CBC)
+
+    with open(input_file, 'rb') as fin, open(output_file, 'w+b') as fout:
+        fout.truncate(header_size + _padded_size(plaintext_size))
+        with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as src, \
+                mmap.mmap(fout.fileno(), 0) as dst:
+            src_view = memoryview(src)
+            dst_view = memoryview(dst)
+            try:
+                # Write the IV followed by the ciphertext
+                dst_view[:header_size] = cipher.iv
+                for offset in range(0, aligned_size, chunk_size):
+                    end = min(offset + chunk_size, aligned_size)
+                    cipher.encrypt(src_view[offset:end],
+                                   output=dst_view[header_size + offset:header_size + end])
+                # Only the trailing partial block (< 16 bytes) is copied to be padded
+                tail = pad(bytes(src_view[aligned_size:]), AES.block_size)
+                dst_view[header_size + aligned_size:] = cipher.encrypt(tail)
+            finally:
+                src_view.release()
+                dst_view.release()
+
+# Decryption (detects the segmented container format, otherwise expects IV || ciphertext)
+def decrypt_file(input_file, output_file, key, chunk_size=CHUNK_SIZE, workers=None):
+    
+    if len(key) != 32:
+        raise ValueError("Key must be 32 bytes long for AES-256.")
+
+    try:
+        with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+            header = _read_header(fin)
+            if header is None:
+                decrypt_stream(fin, fout, key, chunk_size)
+            else:
+                _decrypt_segments(fin, fout, key, header, workers or os.cpu_count() or 1)
+    except ValueError:
+        # Do not leave a partially decrypted file behind
+        os.remove(output_file)
+        raise
+
+# Decrypts CBC blocks [first_block, last_block] of a ciphertext that starts at data_offset.
+# Block i only depends on ciphertext block i - 1 (or the IV), so nothing before it is read.
+def _decrypt_blocks(fin, key, data_offset, iv, first_block, last_block):
+    if first_block == 0:
+        fin.seek(data_offset)
+        prev = iv
+    else:
+        fin.seek(data_offset + (first_block - 1) * AES.block_size)
+        prev = fin.read(AES.block_size)
+
+    size = (last_block - first_block + 1) * AES.block_size
+    data = fin.read(size)
+    if len(prev) != AES.block_size or len(data) != size:
+        raise ValueError("Encrypted file is truncated.")
+    return AES.new(key, AES.MODE_CBC, iv=prev).decrypt(data)
+
+# Random access: decrypts `length` bytes starting at plaintext `offset`, reading only the blocks involved
+# (for GCM containers, only the segments involved)
+def decrypt_range(input_file, key, offset, length):
+
+    if len(key) != 32:
+        raise ValueError("Key must be 32 bytes long for AES-256.")
+    if offset < 0 or length < 0:
+        raise ValueError("Offset and length must not be negative.")
+
+    with open(input_file, 'rb') as fin:
+        header = _read_header(fin)
+        if header is None:
+            # Legacy IV || ciphertext: one segment, the plaintext size comes from the padding of the last block
+            iv = fin.read(AES.block_size)
+            data_offset = AES.block_size
+            ciphertext_size = os.fstat(fin.fileno()).st_size - data_offset
+            if len(iv) != AES.block_size or ciphertext_size <= 0 or ciphertext_size % AES.block_size != 0:
+                raise ValueError("Decryption failed. Ensure the correct key is used.")
+
+            last_block = ciphertext_size // AES.block_size - 1
+            try:
+                tail = unpad(_decrypt_blocks(fin, key, data_offset, iv, last_block, last_block), AES.block_size)
+            except (ValueError, KeyError) as e:
+                raise ValueError("Decryption failed. Ensure the correct key is used.") from e
+            plaintext_size = last_block * AES.block_size + len(tail)
+            segment_size = plaintext_size or AES.block_size
+            mode = CONTAINER_CBC
+            ivs = [iv]
+        else:
+            mode, segment_size, plaintext_size, ivs, raw_header = header
+            data_offset = fin.tell()
+
+        end = min(offset + length, plaintext_size)
+        result = []
+        position = offset
+        while position < end:
+            segment = position // segment_size
+            segment_start = segment * segment_size
+            local_start = position - segment_start
+            local_end = min(end, segment_start + segment_size) - segment_start
+
+            if mode == CONTAINER_GCM:
+                # The tag covers the whole segment, so the segment is verified before any byte is returned
+                fin.seek(data_offset + segment * _segment_stride(mode, segment_size))
+                size = min(segment_size, plaintext_size - segment_start) + GCM_TAG_SIZE
+                data = fin.read(size)
+                if len(data) != size:
+                    raise ValueError("Container is truncated.")
+                plaintext = _decrypt_segment(key, mode, ivs[segment], data, False,
+                                             _segment_aad(raw_header, segment))
+                result.append(plaintext[local_start:local_end])
+            else:
+                first_block = local_start // AES.block_size
+                last_block = (local_end - 1) // AES.block_size
+                plaintext = _decrypt_blocks(fin, key, data_offset + segment_start, ivs[segment],
+                                            first_block, last_block)
+                skip = first_block * AES.block_size
+                result.append(plaintext[local_start - skip:local_end - skip])
+            position = segment_start + local_end
+
+    return b''.join(result)
 
 # Performance Testing
-def performance_test():
-    sizes = [1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024]  # 1KB, 1MB, 10MB, 100MB
-    encryption_times = []
-    decryption_times = []
-    memory_usages = []
-    cpu_usages = []
+def performance_test(argv=None):
+    # The shared benchmark harness lives at the repository root; importing it here keeps the
+    # cipher module free of sys.path changes for code that only imports it
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    import benchmark
 
+    args = benchmark.parse_args("AES-256 file encryption benchmark", argv)
+    sizes = [1024, 1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024]  # 1KB, 1MB, 10MB, 100MB
     key = generate_key()
-    for size in sizes:
-        input_file = f"test_{size}.bin"
-        encrypted_file = f"test_{size}.enc"
-        decrypted_file = f"test_{size}_dec.bin"
-
-        # Generate a test file of the specified size
-        with open(input_file, 'wb') as f:
-            f.write(os.urandom(size))
-
-        # Monitor memory and CPU usage, and encryption time
-        process = psutil.Process(os.getpid())
-        start_memory = process.memory_info().rss
-        start_cpu = process.cpu_percent(interval=None)
-        start_time = time.time()
-        encrypt_file(input_file, encrypted_file, key)
-        encryption_times.append(time.time() - start_time)
-        cpu_usages.append(process.cpu_percent(interval=None) - start_cpu)
-        memory_usages.append(process.memory_info().rss - start_memory)
-
-        # Monitor decryption time
-        start_time = time.time()
-        decrypt_file(encrypted_file, decrypted_file, key)
-        decryption_times.append(time.time() - start_time)
-
-        # Cleanup
-        os.remove(input_file)
-        os.remove(encrypted_file)
-        os.remove(decrypted_file)
-
-    # Plot the results
-    plt.figure(figsize=(12, 8))
-
-    # Encryption/Decryption Times
-    plt.subplot(3, 1, 1)
-    plt.plot([size / 1024 for size in sizes], encryption_times, label="Encryption Time", marker='o')
-    plt.plot([size / 1024 for size in sizes], decryption_times, label="Decryption Time", marker='o')
-    plt.xlabel("Input Size (KB)")
-    plt.ylabel("Time (s)")
-    plt.title("Encryption/Decryption Time vs Input Size")
-    plt.legend()
-
-    # Memory Usage
-    plt.subplot(3, 1, 2)
-    plt.plot([size / 1024 for size in sizes], memory_usages, label="Memory Usage", marker='o')
-    plt.xlabel("Input Size (KB)")
-    plt.ylabel("Memory Usage (bytes)")
-    plt.title("Memory Usage vs Input Size")
-    plt.legend()
-
-    # CPU Utilization
-    plt.subplot(3, 1, 3)
-    plt.plot([size / 1024 for size in sizes], cpu_usages, label="CPU Utilization", marker='o')
-    plt.xlabel("Input Size (KB)")
-    plt.ylabel("CPU Utilization (%)")
-    plt.title("CPU Utilization vs Input Size")
-    plt.legend()
-
-    plt.tight_layout()
-    plt.show()
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            input_file = os.path.join(workdir, f"test_{size}.bin")
+            legacy_file = os.path.join(workdir, f"test_{size}.enc")
+            container_file = os.path.join(workdir, f"test_{size}_cbc.enc")
+            gcm_file = os.path.join(workdir, f"test_{size}_gcm.enc")
+            output_file = os.path.join(workdir, f"test_{size}.out")
+
+            # Generate the test file and its encrypted forms once, outside of the timed runs
+            with open(input_file, 'wb') as f:
+                f.write(os.urandom(size))
+            encrypt_file(input_file, legacy_file, key)
+            encrypt_file_parallel(input_file, container_file, key)
+            encrypt_file_gcm(input_file, gcm_file, key)
+
+            cases = [
+                ("encrypt", lambda: encrypt_file(input_file, output_file, key)),
+                # A chunk as large as the file makes encrypt_file read everything in one go
+                ("encrypt read-all", lambda: encrypt_file(input_file, output_file, key, chunk_size=_padded_size(size))),
+                ("encrypt mmap", lambda: encrypt_file_mmap(input_file, output_file, key)),
+                ("encrypt parallel", lambda: encrypt_file_parallel(input_file, output_file, key)),
+                ("encrypt gcm", lambda: encrypt_file_gcm(input_file, output_file, key)),
+                ("decrypt", lambda: decrypt_file(legacy_file, output_file, key)),
+                ("decrypt parallel", lambda: decrypt_file(container_file, output_file, key)),
+                ("decrypt gcm", lambda: decrypt_file(gcm_file, output_file, key)),
+            ]
+            for name, func in cases:
+                record = benchmark.run(name, func, {'size_bytes': size}, warmup=args.warmup, trials=args.trials)
+                record['mb_per_s'] = size / (1024 * 1024) / (record['p50_ns'] / 1e9)
+                results.append(record)
+
+    benchmark.report(results, args,
+                     ['name', 'size_bytes', 'p50_ns', 'p99_ns', 'mb_per_s', 'cpu_percent', 'peak_alloc_bytes'],
+                     x='size_bytes', y='mb_per_s', xlabel="Input Size (bytes)", ylabel="Throughput (MB/s)",
+                     title="AES-256 Throughput vs Input Size")
 
 if __name__ == "__main__":
     performance_test()
@@ -1,34 +1,222 @@
+import hashlib
+import itertools
+import os
 import random
-from Crypto.Util import number
-import time
-import matplotlib.pyplot as plt
-import psutil
+import secrets
+import string
+import struct
+import sys
+import tempfile
+import threading
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from Crypto.Math import Primality
+
+# The AES file engine (lab1) is found from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from lab1 import aes
+
+# Private key that keeps the factors so private-key operations can use the Chinese Remainder Theorem.
+# d and n come first, so code that only needs (d, n) can keep reading private_key[0] and private_key[1].
+CRTPrivateKey = namedtuple('CRTPrivateKey', ['d', 'n', 'p', 'q', 'dP', 'dQ', 'qInv'])
+
+def make_private_key(d, p, q):
+    """
+    Builds a CRT private key from the private exponent and the prime factors.
+    :param d: Private exponent
+    :param p: First prime factor
+    :param q: Second prime factor
+    :return: CRTPrivateKey
+    """
+    return CRTPrivateKey(d, p * q, p, q, d % (p - 1), d % (q - 1), pow(q, -1, p))
+
+PUBLIC_EXPONENT = 65537  # Common choice for e
+
+# Prime Generation
+def _small_primes(limit):
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b'\x00\x00'
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i in range(3, limit) if sieve[i]]
+
+SMALL_PRIMES = _small_primes(16384)  # odd primes used to sieve candidates before Miller-Rabin
+SIEVE_WINDOW = 4096  # odd candidates sieved at a time
+
+def _miller_rabin_rounds(bits):
+    # Rounds for a 2^-100 error probability on random candidates (FIPS 186-4, table C.2)
+    if bits >= 1536:
+        return 3
+    if bits >= 1024:
+        return 4
+    if bits >= 512:
+        return 7
+    return 40
+
+def is_probable_prime(n, rounds=None):
+    """
+    Miller-Rabin primality test with random bases (pycryptodome's native big-integer code).
+    :param n: Odd integer greater than 3
+    :param rounds: Number of rounds (chosen from the bit length by default)
+    :return: True if n is probably prime
+    """
+    rounds = rounds or _miller_rabin_rounds(n.bit_length())
+    return Primality.miller_rabin_test(n, rounds) == Primality.PROBABLY_PRIME
+
+def generate_prime(bits, e=PUBLIC_EXPONENT):
+    """
+    Generates a random prime with the two top bits set (so p * q has exactly 2 * bits bits)
+    and p - 1 coprime to e. Candidates are sieved by small primes in windows, so Miller-Rabin
+    only runs on numbers without small factors.
+    :param bits: Size of the prime in bits
+    :param e: Public exponent that must not divide p - 1
+    :return: Prime integer
+    """
+    while True:
+        start = secrets.randbits(bits) | (3 << (bits - 2)) | 1
+        sieve = bytearray([1]) * SIEVE_WINDOW
+        for prime in SMALL_PRIMES:
+            # Only primes up to sqrt(start), so a small candidate is never sieved out as its own multiple
+            if prime * prime > start:
+                break
+            # First k with start + 2k divisible by prime
+            k = (-start * ((prime + 1) // 2)) % prime
+            sieve[k::prime] = bytes(len(range(k, SIEVE_WINDOW, prime)))
+
+        for k in range(SIEVE_WINDOW):
+            if not sieve[k]:
+                continue
+            candidate = start + 2 * k
+            if candidate.bit_length() > bits:
+                break
+            if (candidate - 1) % e == 0:
+                continue
+            if is_probable_prime(candidate):
+                return candidate
+
+def _key_pair_from_primes(p, q, e=PUBLIC_EXPONENT):
+    n = p * q
+    phi = (p - 1) * (q - 1)
+    d = pow(e, -1, phi)
+    return ((e, n), make_private_key(d, p, q))
 
 # RSA Key Pair Generation
 def generate_key_pair(key_size=2048):
     """
     Generates RSA public and private keys.
     :param key_size: Size of the key in bits
-    :return: (public_key, private_key)
+    :return: (public_key, private_key) where private_key is a CRTPrivateKey
     """
-    p = number.getPrime(key_size // 2)
-    q = number.getPrime(key_size // 2)
-    n = p * q
-    phi = (p - 1) * (q - 1)
+    p = generate_prime(key_size // 2)
+    q = generate_prime(key_size // 2)
+    while q == p:
+        q = generate_prime(key_size // 2)
+    return _key_pair_from_primes(p, q)
 
-    e = 65537  # Common choice for e
-    d = pow(e, -1, phi)
+class KeyGenerator:
+    """
+    Key-generation service. p and q are searched in parallel worker processes; with prefetch
+    set, that many primes are kept ready or in flight in the background, so generate_key_pair
+    returns in near-constant time while the pool refills.
+    """
+
+    def __init__(self, key_size=2048, workers=None, prefetch=0):
+        """
+        :param key_size: Size of the keys in bits
+        :param workers: Number of worker processes (defaults to the CPU count)
+        :param prefetch: Number of primes to keep pre-generated (0 disables prefetching; with 1,
+            each key pair takes the ready prime and waits for its replacement as the second)
+        """
+        self.key_size = key_size
+        self.prefetch = prefetch
+        self._pool = ProcessPoolExecutor(max_workers=max(2, workers or os.cpu_count() or 1))
+        self._primes = deque(self._submit() for _ in range(prefetch))
+
+    def _submit(self):
+        return self._pool.submit(generate_prime, self.key_size // 2)
+
+    def _take_prime(self):
+        # Prefer a prime that is already done, otherwise wait for whichever finishes first
+        done = [future for future in self._primes if future.done()]
+        if not done:
+            done, _ = wait(self._primes, return_when=FIRST_COMPLETED)
+        future = next(iter(done))
+        self._primes.remove(future)
+        self._primes.append(self._submit())
+        return future.result()
+
+    def warm_up(self):
+        """
+        Blocks until every prefetched prime is ready.
+        """
+        wait(self._primes)
+
+    def generate_key_pair(self):
+        """
+        Generates RSA public and private keys.
+        :return: (public_key, private_key) where private_key is a CRTPrivateKey
+        """
+        if self.prefetch:
+            p = self._take_prime()
+            q = self._take_prime()
+            while q == p:
+                q = self._take_prime()
+        else:
+            p, q = (future.result() for future in [self._submit(), self._submit()])
+            while q == p:
+                q = self._submit().result()
+        return _key_pair_from_primes(p, q)
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
 
-    return ((e, n), (d, n))
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Private-key exponentiation (c^d mod n)
+def private_op(value, private_key):
+    """
+    Raises value to the private exponent, using two half-size exponentiations with
+    the CRT when the factors are known.
+    :param value: Integer smaller than n
+    :param private_key: RSAKey, CRTPrivateKey or a plain (d, n) tuple
+    :return: value^d mod n
+    """
+    if isinstance(private_key, RSAKey):
+        return private_key.private_op(value)
+
+    if len(private_key) == 2:
+        d, n = private_key
+        return pow(value, d, n)
+
+    d, n, p, q, dP, dQ, qInv = private_key
+    m1 = pow(value % p, dP, p)
+    m2 = pow(value % q, dQ, q)
+    h = (qInv * (m1 - m2)) % p
+    return m2 + h * q
+
+def _int_to_message(message_int):
+    try:
+        message_length = (message_int.bit_length() + 7) // 8
+        return message_int.to_bytes(message_length, byteorder='big').decode('utf-8')
+    except Exception as e:
+        raise ValueError("Decryption failed: " + str(e))
 
 # RSA Encryption
 def encrypt(message, public_key):
     """
     Encrypts a message using the RSA public key.
     :param message: Message string to encrypt
-    :param public_key: Tuple containing (e, n)
+    :param public_key: RSAKey or tuple containing (e, n)
     :return: Encrypted message as an integer
     """
+    if isinstance(public_key, RSAKey):
+        return public_key.encrypt(message)
+
     e, n = public_key
     message_int = int.from_bytes(message.encode('utf-8'), byteorder='big')
 
@@ -42,87 +230,427 @@ def decrypt(ciphertext, private_key):
     """
     Decrypts a ciphertext using the RSA private key.
     :param ciphertext: Encrypted message as an integer
-    :param private_key: Tuple containing (d, n)
+    :param private_key: RSAKey, CRTPrivateKey or tuple containing (d, n)
     :return: Decrypted message string
     """
-    d, n = private_key
-    message_int = pow(ciphertext, d, n)
-    
+    return _int_to_message(private_op(ciphertext, private_key))
+
+# Reusable Key Objects
+KEY_CACHE_SIZE = 32  # keys kept warm by the default registry
+
+def key_fingerprint(n):
+    """
+    Fingerprint identifying a key by its modulus.
+    :param n: Modulus
+    :return: Hex SHA-256 digest of the big-endian modulus
+    """
+    return hashlib.sha256(n.to_bytes((n.bit_length() + 7) // 8, byteorder='big')).hexdigest()
+
+class RSAKey:
+    """
+    RSA key whose per-key state is computed once: modulus byte length, fingerprint and,
+    for private keys with known factors, the CRT parameters. The exponentiations use the
+    built-in pow, which already runs a fixed-window exponentiation in C.
+    """
+    __slots__ = ('e', 'd', 'n', 'p', 'q', 'dP', 'dQ', 'qInv', 'byte_length', 'fingerprint')
+
+    def __init__(self, n, e=None, d=None, p=None, q=None):
+        """
+        :param n: Modulus
+        :param e: Public exponent (needed for encryption and verification)
+        :param d: Private exponent (needed for decryption and signing)
+        :param p: First prime factor (enables the CRT)
+        :param q: Second prime factor (enables the CRT)
+        """
+        self.n = n
+        self.e = e
+        self.d = d
+        self.p = p
+        self.q = q
+        self.byte_length = (n.bit_length() + 7) // 8
+        self.fingerprint = key_fingerprint(n)
+
+        if d is not None and p is not None and q is not None:
+            if p * q != n:
+                raise ValueError("The prime factors do not match the modulus.")
+            self.dP = d % (p - 1)
+            self.dQ = d % (q - 1)
+            self.qInv = pow(q, -1, p)
+        else:
+            self.dP = self.dQ = self.qInv = None
+
+    @classmethod
+    def from_public(cls, public_key):
+        """
+        :param public_key: Tuple containing (e, n)
+        :return: RSAKey
+        """
+        e, n = public_key
+        return cls(n, e=e)
+
+    @classmethod
+    def from_private(cls, private_key, e=None):
+        """
+        :param private_key: CRTPrivateKey or tuple containing (d, n)
+        :param e: Optional public exponent, so the key can also encrypt and verify
+        :return: RSAKey
+        """
+        if len(private_key) == 2:
+            d, n = private_key
+            return cls(n, e=e, d=d)
+        d, n, p, q = private_key[:4]
+        return cls(n, e=e, d=d, p=p, q=q)
+
+    def private_op(self, value):
+        if self.d is None:
+            raise ValueError("Not a private key.")
+        if self.dP is None:
+            return pow(value, self.d, self.n)
+        m1 = pow(value % self.p, self.dP, self.p)
+        m2 = pow(value % self.q, self.dQ, self.q)
+        h = (self.qInv * (m1 - m2)) % self.p
+        return m2 + h * self.q
+
+    def encrypt(self, message):
+        if self.e is None:
+            raise ValueError("The public exponent of this key is unknown.")
+        data = message.encode('utf-8')
+        message_int = int.from_bytes(data, byteorder='big')
+        if len(data) > self.byte_length or message_int >= self.n:
+            raise ValueError("Message too large for the key size.")
+        return pow(message_int, self.e, self.n)
+
+    def decrypt(self, ciphertext):
+        return _int_to_message(self.private_op(ciphertext))
+
+class KeyCache:
+    """
+    Bounded LRU registry of warmed RSAKey objects, keyed by fingerprint, key kind and public
+    exponent, so the same modulus loaded with another e gets its own entry.
+    Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=KEY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, key, private=False, e=None):
+        """
+        Returns the cached RSAKey for key, building and caching it on first use.
+        :param key: (e, n) public tuple, or CRTPrivateKey / (d, n) tuple when private
+        :param private: Whether key is a private key
+        :param e: Optional public exponent for private keys
+        :return: RSAKey
+        """
+        entry = (key_fingerprint(key[1]), private, e if private else key[0])
+        with self._lock:
+            cached = self._keys.get(entry)
+            # A plain (d, n) key cached earlier is replaced once the factors are available
+            if cached is not None and not (private and cached.dP is None and len(key) > 2):
+                self._keys.move_to_end(entry)
+                self.hits += 1
+                return cached
+
+        built = RSAKey.from_private(key, e) if private else RSAKey.from_public(key)
+        with self._lock:
+            self.misses += 1
+            self._keys[entry] = built
+            self._keys.move_to_end(entry)
+            while len(self._keys) > self.maxsize:
+                self._keys.popitem(last=False)
+        return built
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def __len__(self):
+        return len(self._keys)
+
+_key_cache = KeyCache()
+
+def load_key(key, private=False, e=None):
+    """
+    Loads a key through the default registry, so hot paths reuse warmed RSAKey objects.
+    :param key: (e, n) public tuple, or CRTPrivateKey / (d, n) tuple when private
+    :param private: Whether key is a private key
+    :param e: Optional public exponent for private keys
+    :return: RSAKey
+    """
+    return _key_cache.load(key, private, e)
+
+# Batch Encryption/Decryption
+BATCH_SIZE = 64  # items sent to a worker process at a time
+
+# Key installed once per worker process by the pool initializer, so it is not pickled with every batch.
+# Only pool workers read it; in-process runs pass their key explicitly, so overlapping calls stay apart.
+_worker_key = None
+
+def _init_worker(key):
+    global _worker_key
+    _worker_key = key
+
+def _encrypt_batch(messages, key=None):
+    key = _worker_key if key is None else key
+    return [encrypt(message, key) for message in messages]
+
+def _decrypt_batch(ciphertexts, key=None):
+    key = _worker_key if key is None else key
+    return [decrypt(ciphertext, key) for ciphertext in ciphertexts]
+
+def _batches(items, size):
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _map_batches(func, items, key, workers, chunk_size):
+    # Checked here rather than in the generator, so a bad chunk size fails at the call
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be at least 1.")
+    return _run_batches(func, items, key, workers or os.cpu_count() or 1, chunk_size)
+
+def _run_batches(func, items, key, workers, chunk_size):
+    if workers == 1:
+        # No pool: avoid the process start-up and pickling cost entirely
+        for batch in _batches(items, chunk_size):
+            yield from func(batch, key)
+        return
+
+    # Results are yielded in input order with a bounded number of batches in flight,
+    # so arbitrarily long generators can be processed in constant memory
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(key,)) as pool:
+        pending = deque()
+        for batch in _batches(items, chunk_size):
+            pending.append(pool.submit(func, batch))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def encrypt_many(messages, public_key, workers=None, chunk_size=BATCH_SIZE):
+    """
+    Encrypts many messages with the same public key across a process pool.
+    :param messages: Iterable or generator of message strings
+    :param public_key: Tuple containing (e, n)
+    :param workers: Number of worker processes (defaults to the CPU count, 1 runs in-process)
+    :param chunk_size: Number of messages sent to a worker at a time
+    :return: Iterator of encrypted integers, in input order
+    """
+    return _map_batches(_encrypt_batch, messages, public_key, workers, chunk_size)
+
+def decrypt_many(ciphertexts, private_key, workers=None, chunk_size=BATCH_SIZE):
+    """
+    Decrypts many ciphertexts with the same private key across a process pool.
+    Each worker receives the key once and uses the CRT path when the key has its factors.
+    :param ciphertexts: Iterable or generator of encrypted integers
+    :param private_key: CRTPrivateKey or tuple containing (d, n)
+    :param workers: Number of worker processes (defaults to the CPU count, 1 runs in-process)
+    :param chunk_size: Number of ciphertexts sent to a worker at a time
+    :return: Iterator of decrypted message strings, in input order
+    """
+    return _map_batches(_decrypt_batch, ciphertexts, private_key, workers, chunk_size)
+
+# RSA Signing (SHA-256 digest raised to the private exponent)
+def sign(message, private_key):
+    """
+    Signs a message with the RSA private key.
+    :param message: Message string to sign
+    :param private_key: RSAKey, CRTPrivateKey or tuple containing (d, n)
+    :return: Signature as an integer
+    """
+    n = private_key.n if isinstance(private_key, RSAKey) else private_key[1]
+    digest = int.from_bytes(hashlib.sha256(message.encode('utf-8')).digest(), byteorder='big')
+    if digest >= n:
+        raise ValueError("Key too small to sign a SHA-256 digest.")
+    return private_op(digest, private_key)
+
+# RSA Signature Verification
+def verify(message, signature, public_key):
+    """
+    Verifies a signature produced by sign.
+    :param message: Message string that was signed
+    :param signature: Signature as an integer
+    :param public_key: RSAKey or tuple containing (e, n)
+    :return: True if the signature is valid
+    """
+    e, n = (public_key.e, public_key.n) if isinstance(public_key, RSAKey) else public_key
+    digest = int.from_bytes(hashlib.sha256(message.encode('utf-8')).digest(), byteorder='big')
+    return pow(signature, e, n) == digest
+
+# Hybrid (envelope) encryption: a random AES-256 session key is wrapped with RSA and the
+# payload is streamed through the AES file engine, so any length costs one RSA operation.
+#
+#   header  : magic | version | wrapped key length
+#   key     : RSA-encrypted session key, big-endian, padded to the modulus length
+#   payload : AES-256-CBC stream (IV || ciphertext) as written by aes.encrypt_stream
+ENVELOPE_MAGIC = b'RSAE'
+ENVELOPE_VERSION = 1
+ENVELOPE_HEADER = struct.Struct('>4sBH')
+
+def encrypt_envelope_stream(fin, fout, public_key, chunk_size=aes.CHUNK_SIZE):
+    """
+    Encrypts a binary stream of any length for the owner of the RSA public key.
+    :param fin: Readable binary file object with the plaintext
+    :param fout: Writable binary file object for the envelope
+    :param public_key: RSAKey or tuple containing (e, n)
+    :param chunk_size: AES streaming chunk size
+    """
+    e, n = (public_key.e, public_key.n) if isinstance(public_key, RSAKey) else public_key
+    if e is None:
+        raise ValueError("The public exponent of this key is unknown.")
+    session_key = aes.generate_key()
+    key_length = (n.bit_length() + 7) // 8
+    wrapped_key = pow(int.from_bytes(session_key, byteorder='big'), e, n)
+
+    fout.write(ENVELOPE_HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION, key_length))
+    fout.write(wrapped_key.to_bytes(key_length, byteorder='big'))
+    aes.encrypt_stream(fin, fout, session_key, chunk_size)
+
+def decrypt_envelope_stream(fin, fout, private_key, chunk_size=aes.CHUNK_SIZE):
+    """
+    Decrypts a stream written by encrypt_envelope_stream.
+    :param fin: Readable binary file object with the envelope
+    :param fout: Writable binary file object for the plaintext
+    :param private_key: RSAKey, CRTPrivateKey or tuple containing (d, n)
+    :param chunk_size: AES streaming chunk size
+    """
+    header = fin.read(ENVELOPE_HEADER.size)
+    if len(header) != ENVELOPE_HEADER.size:
+        raise ValueError("Not an RSA envelope.")
+    magic, version, key_length = ENVELOPE_HEADER.unpack(header)
+    if magic != ENVELOPE_MAGIC or version != ENVELOPE_VERSION:
+        raise ValueError("Not an RSA envelope.")
+
+    wrapped_key = fin.read(key_length)
+    n = private_key.n if isinstance(private_key, RSAKey) else private_key[1]
+    if len(wrapped_key) != key_length or int.from_bytes(wrapped_key, byteorder='big') >= n:
+        raise ValueError("Decryption failed: corrupt wrapped key.")
+
+    session_key_int = private_op(int.from_bytes(wrapped_key, byteorder='big'), private_key)
+    if session_key_int.bit_length() > 256:
+        raise ValueError("Decryption failed: wrong private key.")
+    aes.decrypt_stream(fin, fout, session_key_int.to_bytes(32, byteorder='big'), chunk_size)
+
+def encrypt_envelope(input_file, output_file, public_key, chunk_size=aes.CHUNK_SIZE):
+    """
+    Encrypts a file of any size with RSA + AES-256 envelope encryption.
+    :param input_file: Path of the plaintext file
+    :param output_file: Path of the envelope to write
+    :param public_key: RSAKey or tuple containing (e, n)
+    """
+    with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+        encrypt_envelope_stream(fin, fout, public_key, chunk_size)
+
+def decrypt_envelope(input_file, output_file, private_key, chunk_size=aes.CHUNK_SIZE):
+    """
+    Decrypts a file written by encrypt_envelope.
+    :param input_file: Path of the envelope
+    :param output_file: Path of the plaintext file to write
+    :param private_key: RSAKey, CRTPrivateKey or tuple containing (d, n)
+    """
     try:
-        message_length = (message_int.bit_length() + 7) // 8
-        return message_int.to_bytes(message_length, byteorder='big').decode('utf-8')
-    except Exception as e:
-        raise ValueError("Decryption failed: " + str(e))
+        with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+            decrypt_envelope_stream(fin, fout, private_key, chunk_size)
+    except ValueError:
+        # Do not leave a partially decrypted file behind
+        os.remove(output_file)
+        raise
 
 # Performance Testing
-def performance_test():
+BATCH_COUNT = 64  # ciphertexts per decrypt_many run
+KEYGEN_TRIALS = 3  # key generation is slow, so it gets fewer trials
+ENVELOPE_SIZES = [1024, 1024 * 1024, 10 * 1024 * 1024]  # 1KB, 1MB, 10MB
+
+def random_message(size):
+    """
+    Generates a printable message of the given size.
+    :param size: Message size in bytes
+    :return: Message string
+    """
+    return ''.join(random.choices(string.ascii_letters + string.digits, k=size))
+
+def performance_test(argv=None):
+    import benchmark  # the shared harness, also at the repository root
+
+    args = benchmark.parse_args("RSA encryption/decryption benchmark", argv)
     key_sizes = [1024, 2048, 4096]
     message_sizes = [16, 32, 64]  # in bytes
-    encryption_times = {}
-    decryption_times = {}
-    memory_usages = {}
-    cpu_usages = {}
+    results = []
 
     for key_size in key_sizes:
+        # Key generation: serial, p and q in parallel, and served from a warm prefetch pool
+        keygen_trials = min(args.trials, KEYGEN_TRIALS)
+        params = {'key_size': key_size, 'message_size': 0}
+        results.append(benchmark.run(f"keygen {key_size}-bit", lambda: generate_key_pair(key_size), params,
+                                     warmup=0, trials=keygen_trials, trace_memory=False))
+        with KeyGenerator(key_size) as generator:
+            results.append(benchmark.run(f"keygen parallel {key_size}-bit", generator.generate_key_pair, params,
+                                         warmup=0, trials=keygen_trials, trace_memory=False))
+        with KeyGenerator(key_size, prefetch=2 * keygen_trials) as generator:
+            generator.warm_up()
+            results.append(benchmark.run(f"keygen prefetched {key_size}-bit", generator.generate_key_pair, params,
+                                         warmup=0, trials=keygen_trials, trace_memory=False))
+
+        # The key used below is generated outside of the timed runs
         public_key, private_key = generate_key_pair(key_size)
-        encryption_times[key_size] = []
-        decryption_times[key_size] = []
-        memory_usages[key_size] = []
-        cpu_usages[key_size] = []
 
         for size in message_sizes:
-            message = 'jayanth kumar'
-            start_time = time.time()
+            message = random_message(size)
             ciphertext = encrypt(message, public_key)
-            encryption_time = time.time() - start_time
-
-            start_time = time.time()
-            decrypted_message = decrypt(ciphertext, private_key)
-            decryption_time = time.time() - start_time
+            assert decrypt(ciphertext, private_key) == message, "Decryption failed"
 
-            memory_info = psutil.Process().memory_info().rss / (1024 ** 2)  # Memory in MB
-            cpu_info = psutil.cpu_percent(interval=0.1)
+            params = {'key_size': key_size, 'message_size': size}
+            results.append(benchmark.run(f"encrypt {key_size}-bit", lambda: encrypt(message, public_key), params,
+                                         warmup=args.warmup, trials=args.trials))
+            plain = benchmark.run(f"decrypt (d, n) {key_size}-bit", lambda: decrypt(ciphertext, private_key[:2]),
+                                  params, warmup=args.warmup, trials=args.trials)
+            crt = benchmark.run(f"decrypt CRT {key_size}-bit", lambda: decrypt(ciphertext, private_key), params,
+                                warmup=args.warmup, trials=args.trials)
+            crt['crt_speedup'] = plain['p50_ns'] / crt['p50_ns']
+            cached = benchmark.run(f"decrypt RSAKey {key_size}-bit",
+                                   lambda: load_key(private_key, private=True).decrypt(ciphertext), params,
+                                   warmup=args.warmup, trials=args.trials)
+            results.extend([plain, crt, cached])
 
-            encryption_times[key_size].append(encryption_time)
-            decryption_times[key_size].append(decryption_time)
-            memory_usages[key_size].append(memory_info)
-            cpu_usages[key_size].append(cpu_info)
+        # Batch decryption throughput, serial versus one worker per core
+        ciphertexts = [encrypt(random_message(32), public_key) for _ in range(BATCH_COUNT)]
+        for workers in sorted({1, os.cpu_count() or 1}):
+            record = benchmark.run(f"decrypt_many {key_size}-bit x{workers}",
+                                   lambda: list(decrypt_many(ciphertexts, private_key, workers=workers)),
+                                   {'key_size': key_size, 'message_size': 32, 'workers': workers},
+                                   warmup=args.warmup, trials=args.trials, trace_memory=False)
+            record['ops_per_s'] = BATCH_COUNT / (record['p50_ns'] / 1e9)
+            results.append(record)
 
-            assert message == decrypted_message, "Decryption failed"
+        # Envelope encryption for payloads far beyond the modulus size
+        with tempfile.TemporaryDirectory() as workdir:
+            for size in ENVELOPE_SIZES:
+                input_file = os.path.join(workdir, f"test_{size}.bin")
+                envelope_file = os.path.join(workdir, f"test_{size}.env")
+                output_file = os.path.join(workdir, f"test_{size}.out")
+                with open(input_file, 'wb') as f:
+                    f.write(os.urandom(size))
+                encrypt_envelope(input_file, envelope_file, public_key)
 
-    visualize_performance(key_sizes, message_sizes, encryption_times, decryption_times, memory_usages, cpu_usages)
+                params = {'key_size': key_size, 'message_size': size}
+                results.append(benchmark.run(f"envelope encrypt {key_size}-bit",
+                                             lambda: encrypt_envelope(input_file, output_file, public_key), params,
+                                             warmup=args.warmup, trials=args.trials))
+                results.append(benchmark.run(f"envelope decrypt {key_size}-bit",
+                                             lambda: decrypt_envelope(envelope_file, output_file, private_key), params,
+                                             warmup=args.warmup, trials=args.trials))
 
-# Visualization
-def visualize_performance(key_sizes, message_sizes, encryption_times, decryption_times, memory_usages, cpu_usages):
-    for key_size in key_sizes:
-        plt.figure(figsize=(10, 6))
-
-        plt.subplot(2, 2, 1)
-        plt.plot(message_sizes, encryption_times[key_size], label=f'Encryption {key_size}-bit')
-        plt.xlabel('Message Size (bytes)')
-        plt.ylabel('Time (s)')
-        plt.legend()
-
-        plt.subplot(2, 2, 2)
-        plt.plot(message_sizes, decryption_times[key_size], label=f'Decryption {key_size}-bit')
-        plt.xlabel('Message Size (bytes)')
-        plt.ylabel('Time (s)')
-        plt.legend()
-
-        plt.subplot(2, 2, 3)
-        plt.plot(message_sizes, memory_usages[key_size], label=f'Memory {key_size}-bit')
-        plt.xlabel('Message Size (bytes)')
-        plt.ylabel('Memory (MB)')
-        plt.legend()
-
-        plt.subplot(2, 2, 4)
-        plt.plot(message_sizes, cpu_usages[key_size], label=f'CPU {key_size}-bit')
-        plt.xlabel('Message Size (bytes)')
-        plt.ylabel('CPU Usage (%)')
-        plt.legend()
-
-        plt.tight_layout()
-        plt.show()
+    benchmark.report(results, args,
+                     ['name', 'message_size', 'p50_ns', 'p90_ns', 'p99_ns', 'crt_speedup', 'ops_per_s',
+                      'cpu_percent', 'peak_alloc_bytes'],
+                     x='message_size', y='p50_ns', xlabel="Message Size (bytes)", ylabel="Median Time (ns)",
+                     title="RSA Time vs Message Size")
 
 if __name__ == "__main__":
     performance_test()
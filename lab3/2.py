@@ -1,62 +1,98 @@
-import re
+import argparse
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def check_password(password, criteria):
-    if len(password) < 8:
-        return "invalid", "Less than 8 Characters"
+from password_policy import get_policy, np, summarize
 
-    errors = []
-    special_chars = "!@#"
+# Streaming file auditor
+# The file is cut into byte ranges that are audited by worker processes. Every worker reads its
+# range in blocks, so memory stays bounded, and owns the lines that start inside its range.
+BLOCK_SIZE = 8 * 1024 * 1024
 
-    if "1" in criteria and not any(char.isupper() for char in password):
-        errors.append("Missing Uppercase letters")
+def _count_lines(lines, criteria, use_numpy, blocklist_path):
+    text = b"\n".join(lines).decode("utf-8", "replace")
+    passwords = [password for password in (line.strip() for line in text.split("\n")) if password]
+    return get_policy(criteria, blocklist_path).count_failures(passwords, use_numpy)
 
-    if "2" in criteria and not any(char.islower() for char in password):
-        errors.append("Missing Lowercase letters")
+def _audit_range(path, start, end, criteria, block_size, use_numpy, blocklist_path):
+    counts = Counter()
+    with open(path, "rb") as file:
+        if start:
+            # Skip the line that started in the previous range
+            file.seek(start - 1)
+            file.readline()
+        position = file.tell()
 
-    if "3" in criteria and not any(char.isdigit() for char in password):
-        errors.append("Missing Numbers")
+        tail = b""
+        while position < end:
+            block = file.read(min(block_size, end - position))
+            if not block:
+                break
+            position += len(block)
+            lines = (tail + block).split(b"\n")
+            tail = lines.pop()
+            counts.update(_count_lines(lines, criteria, use_numpy, blocklist_path))
 
-    if "4" in criteria:
-        if not any(char in special_chars for char in password):
-            errors.append("Missing Special characters")
-        if any(char not in special_chars and not char.isalnum() for char in password):
-            errors.append("Contains invalid special characters")
+        if tail:
+            # Finish the line that crosses the end of the range
+            counts.update(_count_lines([tail + file.readline()], criteria, use_numpy,
+                                       blocklist_path))
+    return counts
 
-    return ("valid", None) if not errors else ("invalid", ", ".join(errors))
+def audit_file(path, criteria, workers=None, block_size=BLOCK_SIZE, use_numpy=False, blocklist_path=None):
+    """
+    Audits a password file, one password per line, across a process pool.
+    Each worker maps the blocklist file itself, if one is given.
+    Returns {"valid": n, "invalid": n, "failures": {reason: n}}.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    # A few ranges per worker keeps the pool balanced when some ranges are slower
+    range_size = max(block_size, -(-size // (workers * 4)))
+    ranges = [(start, min(start + range_size, size)) for start in range(0, size, range_size)]
 
-# Get user input for criteria
-print("Select criteria to check (comma-separated):")
-print("1. Uppercase letters (A-Z)")
-print("2. Lowercase letters (a-z)")
-print("3. Numbers (0-9)")
-print("4. Special characters (!, @, #)")
-criteria_input = input("Enter your choices (e.g., 1,3,4): ").strip()
-criteria = criteria_input.split(",")
+    counts = Counter()
+    if workers == 1:
+        for start, end in ranges:
+            counts.update(_audit_range(path, start, end, criteria, block_size, use_numpy, blocklist_path))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_audit_range, path, start, end, criteria, block_size, use_numpy, blocklist_path)
+                       for start, end in ranges]
+            for future in as_completed(futures):
+                counts.update(future.result())
+    return summarize(counts)
 
-valid_count = 0
-invalid_count = 0
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit a password file against the selected criteria.")
+    parser.add_argument("path", nargs="?", default="input.txt", help="password file, one per line")
+    parser.add_argument("-c", "--criteria", default="1,2,3,4",
+                        help="comma-separated: 1 uppercase (A-Z), 2 lowercase (a-z), 3 numbers (0-9), "
+                             "4 special characters (!, @, #)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="bytes read at a time by each worker")
+    parser.add_argument("--numpy", action="store_true", help="use the NumPy batch check")
+    parser.add_argument("--blocklist", default=None, help="breached-password blocklist built with blocklist.py")
+    args = parser.parse_args(argv)
+    criteria = args.criteria.split(",")
 
-# Read passwords from file
-try:
-    with open("input.txt", "r") as file:
-        passwords = file.readlines()
-
-    for password in passwords:
-        password = password.strip()
-        if not password:
-            continue  # Skip empty lines
-
-        status, reason = check_password(password, criteria)
-        if status == "valid":
-            valid_count += 1
-        else:
-            invalid_count += 1
+    try:
+        summary = audit_file(args.path, criteria, args.workers, args.block_size, args.numpy and np is not None,
+                             args.blocklist)
+    except FileNotFoundError:
+        print(f"Error: '{args.path}' file not found. Please create the file with passwords.")
+        return 1
 
     # Display final results
-    print("\nTotal Passwords Checked:", valid_count + invalid_count)
-    print("Valid Passwords:", valid_count)
-    print("Invalid Passwords:", invalid_count)
-
-except FileNotFoundError:
-    print("Error: 'input.txt' file not found. Please create the file with passwords.")
+    print("Total Passwords Checked:", summary["valid"] + summary["invalid"])
+    print("Valid Passwords:", summary["valid"])
+    print("Invalid Passwords:", summary["invalid"])
+    for reason, count in summary["failures"].items():
+        if count:
+            print(f"  {reason}: {count}")
+    return 0
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+
+# Breached-password blocklist backed by a Bloom filter file
+# The builder turns a wordlist (one password per line) into a bit array sized for the wanted
+# false-positive rate, about 1.2 bytes per entry at 1%. Lookups memory-map the file, so loading
+# is instant, and a membership test touches only the k bits of the password.
+#
+#   header : magic | hash count (k) | bit count (m) | entry count
+#   bits   : m bits, least significant bit first
+MAGIC = b'PWBLOOM1'
+HEADER = struct.Struct('>8sIQQ')
+FALSE_POSITIVE_RATE = 0.001
+
+def _probes(password, hash_count, bit_count):
+    # Double hashing (Kirsch-Mitzenmacher): k positions from one 128-bit digest
+    digest = hashlib.blake2b(password.encode('utf-8'), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:], 'little') | 1
+    return [(h1 + i * h2) % bit_count for i in range(hash_count)]
+
+def filter_size(entries, false_positive_rate=FALSE_POSITIVE_RATE):
+    """Returns (bit count, hash count) for a filter holding `entries` passwords."""
+    if not 0 < false_positive_rate < 1:
+        raise ValueError("The false-positive rate must be between 0 and 1.")
+    entries = max(entries, 1)
+    bit_count = max(8, math.ceil(-entries * math.log(false_positive_rate) / math.log(2) ** 2))
+    hash_count = max(1, round(bit_count / entries * math.log(2)))
+    return bit_count, hash_count
+
+def _read_passwords(wordlist_path):
+    with open(wordlist_path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            password = line.strip()
+            if password:
+                yield password
+
+def build_blocklist(wordlist_path, output_path, false_positive_rate=FALSE_POSITIVE_RATE, expected_entries=None):
+    """
+    Builds a Bloom filter file from a wordlist. The bits are set straight into a memory-mapped
+    output file, so the wordlist is never held in memory.
+    Returns the number of entries added.
+    """
+    if expected_entries is None:
+        # First pass only counts the entries to size the filter
+        expected_entries = sum(1 for _ in _read_passwords(wordlist_path))
+    bit_count, hash_count = filter_size(expected_entries, false_positive_rate)
+
+    entries = 0
+    with open(output_path, 'w+b') as file:
+        file.truncate(HEADER.size + (bit_count + 7) // 8)
+        with mmap.mmap(file.fileno(), 0) as data:
+            for password in _read_passwords(wordlist_path):
+                for position in _probes(password, hash_count, bit_count):
+                    index = HEADER.size + (position >> 3)
+                    data[index] |= 1 << (position & 7)
+                entries += 1
+            data[:HEADER.size] = HEADER.pack(MAGIC, hash_count, bit_count, entries)
+    return entries
+
+class Blocklist:
+    """Read-only, memory-mapped Bloom filter. `password in blocklist` may give false positives, never false negatives."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._data) < HEADER.size:
+            self._data.close()
+            raise ValueError(f"'{path}' is not a blocklist file.")
+        magic, self.hash_count, self.bit_count, self.entries = HEADER.unpack(self._data[:HEADER.size])
+        if magic != MAGIC or len(self._data) < HEADER.size + (self.bit_count + 7) // 8:
+            self._data.close()
+            raise ValueError(f"'{path}' is not a blocklist file.")
+
+    def __contains__(self, password):
+        data = self._data
+        for position in _probes(password, self.hash_count, self.bit_count):
+            if not data[HEADER.size + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.entries
+
+    def close(self):
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a breached-password blocklist.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a blocklist file from a wordlist")
+    build.add_argument("wordlist", help="password list, one per line")
+    build.add_argument("output", help="blocklist file to write")
+    build.add_argument("--fp-rate", type=float, default=FALSE_POSITIVE_RATE, help="target false-positive rate")
+    build.add_argument("--entries", type=int, default=None, help="expected entries (skips the counting pass)")
+    check = commands.add_parser("check", help="check passwords against a blocklist file")
+    check.add_argument("blocklist", help="blocklist file")
+    check.add_argument("passwords", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        entries = build_blocklist(args.wordlist, args.output, args.fp_rate, args.entries)
+        print(f"Added {entries} passwords, {os.path.getsize(args.output)} bytes.")
+    else:
+        with Blocklist(args.blocklist) as blocklist:
+            for password in args.passwords:
+                print(f"'{password}' -> {'breached' if password in blocklist else 'not found'}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
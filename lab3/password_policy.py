@@ -0,0 +1,191 @@
+from collections import Counter
+from functools import lru_cache
+
+try:
+    from blocklist import Blocklist
+except ImportError:  # imported as lab3.password_policy from another lab
+    from .blocklist import Blocklist
+
+try:
+    import numpy as np
+except ImportError:  # the NumPy batch path is optional
+    np = None
+
+# Password policy library
+# Each character is mapped once to a bit mask of the classes it belongs to. OR-ing the masks
+# of a password gives every class it contains in a single pass, and the selected criteria are
+# compiled into the masks they require, so a password is checked with a few bit operations.
+#
+# Criteria: "1" uppercase (A-Z), "2" lowercase (a-z), "3" numbers (0-9), "4" special characters (!, @, #)
+MIN_LENGTH = 8
+SPECIAL_CHARS = "!@#"
+DEFAULT_CRITERIA = "1,2,3,4"
+# Longest password checked in the NumPy batch path; the batch matrix is this wide at most, so
+# one long junk line in a leak list cannot blow it up. Longer ones take the scalar path.
+NUMPY_MAX_LENGTH = 128
+
+UPPER, LOWER, DIGIT, SPECIAL, OTHER = 1, 2, 4, 8, 16
+
+# Failure bits, in the order the reasons are reported
+TOO_SHORT, NO_UPPER, NO_LOWER, NO_DIGIT, NO_SPECIAL, BAD_SPECIAL, BREACHED = 1, 2, 4, 8, 16, 32, 64
+FAILURE_REASONS = {
+    TOO_SHORT: "Less than 8 Characters",
+    NO_UPPER: "Missing Uppercase letters",
+    NO_LOWER: "Missing Lowercase letters",
+    NO_DIGIT: "Missing Numbers",
+    NO_SPECIAL: "Missing Special characters",
+    BAD_SPECIAL: "Contains invalid special characters",
+    BREACHED: "Found in breached password list",
+}
+
+# (criterion, class bit, failure bit when the class is missing)
+_REQUIREMENTS = [("1", UPPER, NO_UPPER), ("2", LOWER, NO_LOWER), ("3", DIGIT, NO_DIGIT), ("4", SPECIAL, NO_SPECIAL)]
+
+@lru_cache(maxsize=None)
+def char_class(char):
+    mask = 0
+    if char.isupper():
+        mask |= UPPER
+    if char.islower():
+        mask |= LOWER
+    if char.isdigit():
+        mask |= DIGIT
+    if char in SPECIAL_CHARS:
+        mask |= SPECIAL
+    elif not char.isalnum():
+        mask |= OTHER
+    return mask
+
+# Lookup table for ASCII passwords, used with bytes.translate
+ASCII_CLASSES = bytes(char_class(chr(i)) if i < 128 else 0 for i in range(256))
+
+def class_mask(password):
+    if password.isascii():
+        mask = 0
+        for classes in set(password.encode('ascii').translate(ASCII_CLASSES)):
+            mask |= classes
+        return mask
+    mask = 0
+    for char in set(password):
+        mask |= char_class(char)
+    return mask
+
+def failure_reasons(bits):
+    return [reason for failure_bit, reason in FAILURE_REASONS.items() if bits & failure_bit]
+
+def summarize(failure_counts):
+    """Turns a Counter of failure bits into valid/invalid totals and per-criterion failure counts."""
+    summary = {"valid": failure_counts.get(0, 0), "invalid": 0,
+               "failures": {reason: 0 for reason in FAILURE_REASONS.values()}}
+    for bits, count in failure_counts.items():
+        if not bits:
+            continue
+        summary["invalid"] += count
+        for reason in failure_reasons(bits):
+            summary["failures"][reason] += count
+    return summary
+
+class Policy:
+    """
+    Password policy compiled once from the selected criteria. Validation does no I/O apart from
+    reading the memory-mapped blocklist, if one is given.
+    """
+
+    def __init__(self, criteria=DEFAULT_CRITERIA, blocklist=None):
+        self.criteria = normalize_criteria(criteria)
+        self.blocklist = blocklist
+        self._required = [(class_bit, failure_bit) for number, class_bit, failure_bit in _REQUIREMENTS
+                          if number in self.criteria]
+        self._check_other = "4" in self.criteria
+
+    def __repr__(self):
+        return f"Policy({','.join(sorted(self.criteria))!r})"
+
+    def failures(self, password):
+        """Failure bits of a password (0 means valid)."""
+        if len(password) < MIN_LENGTH:
+            return TOO_SHORT
+        mask = class_mask(password)
+        result = 0
+        for class_bit, failure_bit in self._required:
+            if not mask & class_bit:
+                result |= failure_bit
+        if self._check_other and mask & OTHER:
+            result |= BAD_SPECIAL
+        if self.blocklist is not None and password in self.blocklist:
+            result |= BREACHED
+        return result
+
+    def is_valid(self, password):
+        return not self.failures(password)
+
+    def validate(self, password):
+        """Returns ("valid", None) or ("invalid", reasons)."""
+        bits = self.failures(password)
+        return ("valid", None) if not bits else ("invalid", ", ".join(failure_reasons(bits)))
+
+    def count_failures(self, passwords, use_numpy=False):
+        """Counter of failure bits over a batch of passwords."""
+        passwords = list(passwords)
+        if use_numpy and np is not None and passwords:
+            vectorized, scalar = [], []
+            for password in passwords:
+                (vectorized if password.isascii() and len(password) <= NUMPY_MAX_LENGTH else scalar).append(password)
+            counts = self._numpy_failures(vectorized) if vectorized else Counter()
+            counts.update(map(self.failures, scalar))
+            return counts
+        return Counter(map(self.failures, passwords))
+
+    def check_passwords(self, passwords, use_numpy=False):
+        """
+        Validates a batch of passwords.
+        Returns {"valid": n, "invalid": n, "failures": {reason: n}}.
+        """
+        return summarize(self.count_failures(passwords, use_numpy))
+
+    def _numpy_failures(self, passwords):
+        # passwords must all be ASCII and at most NUMPY_MAX_LENGTH long; returns a Counter of failure bits
+        lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+        width = max(int(lengths.max()), 1)
+        chars = np.array(passwords, dtype=f'S{width}').view(np.uint8).reshape(len(passwords), width)
+        in_password = np.arange(width) < lengths[:, None]
+        classes = np.where(in_password, np.frombuffer(ASCII_CLASSES, dtype=np.uint8)[chars], 0)
+        masks = np.bitwise_or.reduce(classes, axis=1)
+
+        result = np.zeros(len(passwords), dtype=np.uint8)
+        for class_bit, failure_bit in self._required:
+            result |= np.where(masks & class_bit, 0, failure_bit).astype(np.uint8)
+        if self._check_other:
+            result |= np.where(masks & OTHER, BAD_SPECIAL, 0).astype(np.uint8)
+        if self.blocklist is not None:
+            breached = np.fromiter((password in self.blocklist for password in passwords), dtype=bool,
+                                   count=len(passwords))
+            result |= np.where(breached, BREACHED, 0).astype(np.uint8)
+        result = np.where(lengths < MIN_LENGTH, TOO_SHORT, result)
+
+        values, counts = np.unique(result, return_counts=True)
+        return Counter(dict(zip(values.tolist(), counts.tolist())))
+
+def normalize_criteria(criteria):
+    """Accepts "1,3,4" or an iterable of criterion numbers and returns them as a frozenset."""
+    if isinstance(criteria, str):
+        criteria = criteria.split(",")
+    return frozenset(number.strip() for number in criteria if number.strip())
+
+@lru_cache(maxsize=32)
+def _compiled_policy(criteria, blocklist_path):
+    return Policy(criteria, Blocklist(blocklist_path) if blocklist_path else None)
+
+def get_policy(criteria=DEFAULT_CRITERIA, blocklist_path=None):
+    """
+    Returns the compiled Policy for these criteria (and optional blocklist file), compiling it
+    and mapping the blocklist only on first use.
+    """
+    return _compiled_policy(normalize_criteria(criteria), blocklist_path)
+
+def check_password(password, criteria=DEFAULT_CRITERIA, blocklist_path=None):
+    """Returns ("valid", None) or ("invalid", reasons)."""
+    return get_policy(criteria, blocklist_path).validate(password)
+
+def check_passwords(passwords, criteria=DEFAULT_CRITERIA, use_numpy=False, blocklist_path=None):
+    return get_policy(criteria, blocklist_path).check_passwords(passwords, use_numpy)
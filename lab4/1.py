@@ -1,9 +1,29 @@
 import os
-import hashlib
+import sys
 import getpass
 
-# A simple in-memory user database (username: (salt, hashed_password))
-users_db = {}
+# The password policy library (lab3) is found from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from lab3.password_policy import get_policy
+from credential_store import open_store
+from hashing_service import HashingService
+from rate_limiter import LoginRateLimiter
+
+# Compiled once; validating a password does no I/O
+registration_policy = get_policy()
+
+# Persistent user database (username -> salt, hash, iteration count, algorithm) in a local SQLite
+# file; lookups go through its index, so nothing is loaded into memory at startup
+USERS_DB_PATH = os.environ.get('USERS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'users.db'))
+users_db = open_store(USERS_DB_PATH)
+
+# PBKDF2 runs on a bounded worker pool instead of the calling thread. The iteration count is
+# calibrated on startup so one hash takes about PBKDF2_TARGET_MS milliseconds on this machine.
+PBKDF2_TARGET_LATENCY = float(os.environ.get('PBKDF2_TARGET_MS', '50')) / 1000
+hashing_service = HashingService(target_latency=PBKDF2_TARGET_LATENCY)
+
+# Login attempts per username and per local user are limited before any hashing happens
+login_limiter = LoginRateLimiter()
 
 def register():
     username = input("Enter a username for registration: ")
@@ -12,62 +32,64 @@ def register():
         return
     
     password = getpass.getpass("Enter your password: ")
+    status, reason = registration_policy.validate(password)
+    if status != "valid":
+        print("Weak password: " + reason)
+        return
     
-    # Generate a 16-byte salt using a secure random generator
-    salt = os.urandom(16)
-    
-    # Hash the password with SHA-256 using PBKDF2 for key stretching
-    hashed_password = hashlib.pbkdf2_hmac(
-        'sha256',           # The hash digest algorithm for HMAC
-        password.encode(),  # Convert the password to bytes
-        salt,               # Provide the salt
-        100000              # It is recommended to use at least 100,000 iterations of SHA-256
-    )
+    # Hash the password with SHA-256 using PBKDF2 for key stretching, with a fresh 16-byte salt
+    credential = hashing_service.hash_password_sync(password)
     
-    # Store the salt and hashed password in the users_db
-    users_db[username] = (salt, hashed_password)
+    # Store the salt, hashed password and hashing parameters in the users_db (committed before returning)
+    users_db.put(username, credential)
     print("Registration successful!")
 
 def login():
     username = input("Enter your username: ")
-    if username not in users_db:
+    if not login_limiter.allow(username, getpass.getuser()):
+        print("Too many login attempts. Please try again later.")
+        return
+
+    credential = users_db.get(username)
+    if credential is None:
         print("Username does not exist!")
         return
 
     password = getpass.getpass("Enter your password: ")
-    salt, stored_hash = users_db[username]
-    
-    # Hash the provided password with the same salt and iterations
-    hashed_password = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode(),
-        salt,
-        100000
-    )
     
-    # Compare the newly computed hash with the stored hash
-    if hashed_password == stored_hash:
+    # Hash the provided password with the same salt and iterations and compare it with the stored hash
+    valid, upgraded = hashing_service.verify_and_rehash_sync(password, credential)
+    if valid:
+        if upgraded is not None:
+            # The stored hash used outdated parameters; replace it with the current ones
+            users_db.put(username, upgraded)
+        login_limiter.succeeded(username)
         print("Login successful!")
     else:
         print("Invalid password!")
 
 def main():
-    while True:
-        print("\n--- Menu ---")
-        print("1. Register")
-        print("2. Login")
-        print("3. Quit")
-        choice = input("Enter your choice (1/2/3): ")
+    try:
+        while True:
+            print("\n--- Menu ---")
+            print("1. Register")
+            print("2. Login")
+            print("3. Quit")
+            choice = input("Enter your choice (1/2/3): ")
 
-        if choice == '1':
-            register()
-        elif choice == '2':
-            login()
-        elif choice == '3':
-            print("Exiting the system. Goodbye!")
-            break
-        else:
-            print("Invalid choice. Please try again.")
+            if choice == '1':
+                register()
+            elif choice == '2':
+                login()
+            elif choice == '3':
+                print("Exiting the system. Goodbye!")
+                break
+            else:
+                print("Invalid choice. Please try again.")
+    finally:
+        # Close the user database and stop the hashing workers
+        users_db.close()
+        hashing_service.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,118 @@
+import sqlite3
+import struct
+import threading
+from collections import namedtuple
+
+# Credential records
+# Stored as one compact binary blob per user:
+#   algorithm id (1) | iteration count (4) | salt length (1) | salt | hash
+Credential = namedtuple('Credential', ['salt', 'hash', 'iterations', 'algorithm'])
+
+ALGORITHMS = {'sha256': 1, 'sha512': 2}
+ALGORITHM_NAMES = {number: name for name, number in ALGORITHMS.items()}
+RECORD_HEADER = struct.Struct('>BIB')
+
+def pack_credential(credential):
+    salt, hashed, iterations, algorithm = credential
+    return RECORD_HEADER.pack(ALGORITHMS[algorithm], iterations, len(salt)) + salt + hashed
+
+def unpack_credential(record):
+    algorithm, iterations, salt_length = RECORD_HEADER.unpack_from(record)
+    salt_end = RECORD_HEADER.size + salt_length
+    return Credential(record[RECORD_HEADER.size:salt_end], record[salt_end:], iterations,
+                      ALGORITHM_NAMES[algorithm])
+
+# Storage backends
+# Every backend offers get / put / put_many / flush / close and `username in store`.
+class MemoryStore:
+    """In-memory store, lost on exit (the original behaviour)."""
+
+    def __init__(self):
+        self._records = {}
+
+    def __contains__(self, username):
+        return username in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, username):
+        record = self._records.get(username)
+        return unpack_credential(record) if record is not None else None
+
+    def put(self, username, credential):
+        self._records[username] = pack_credential(credential)
+
+    def put_many(self, items):
+        for username, credential in items:
+            self.put(username, credential)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class SQLiteStore:
+    """
+    Persistent store in a local SQLite file. Lookups go through the primary-key index, so
+    nothing is loaded at startup. put() commits before returning, so a record is durable and
+    visible to other connections once it is stored; put_many() commits in batches of
+    batch_size with a single executemany per transaction.
+    """
+
+    UPSERT = ("INSERT INTO users (username, record) VALUES (?, ?) "
+              "ON CONFLICT(username) DO UPDATE SET record = excluded.record")
+
+    def __init__(self, path, batch_size=64):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, record BLOB NOT NULL) WITHOUT ROWID")
+        self._connection.commit()
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def get(self, username):
+        with self._lock:
+            row = self._connection.execute("SELECT record FROM users WHERE username = ?", (username,)).fetchone()
+        return unpack_credential(row[0]) if row else None
+
+    def put(self, username, credential):
+        self._write([(username, pack_credential(credential))])
+
+    def put_many(self, items):
+        batch = []
+        for username, credential in items:
+            batch.append((username, pack_credential(credential)))
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def _write(self, records):
+        with self._lock, self._connection:
+            self._connection.executemany(self.UPSERT, records)
+
+    def flush(self):
+        pass  # every write is committed before put / put_many return
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+def open_store(path=None, batch_size=64):
+    """Opens a SQLiteStore at path, or a MemoryStore when no path is given."""
+    if path is None:
+        return MemoryStore()
+    return SQLiteStore(path, batch_size)
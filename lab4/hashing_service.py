@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from credential_store import Credential
+
+ALGORITHM = 'sha256'
+ITERATIONS = 100000  # It is recommended to use at least 100,000 iterations of SHA-256
+TARGET_LATENCY = 0.05  # seconds per hash when the iteration count is calibrated
+REHASH_TOLERANCE = 0.1  # stored counts within 10% of the current one are not rehashed
+SALT_SIZE = 16
+MAX_PENDING = 64  # hashes queued or running before callers are pushed back
+LATENCY_SAMPLES = 1024  # recent latencies kept for the metrics
+
+class Overloaded(RuntimeError):
+    """Raised when the hashing queue stays full for longer than the queue timeout."""
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+# Work-factor calibration
+def calibrate_iterations(target_latency=TARGET_LATENCY, algorithm=ALGORITHM, minimum=ITERATIONS,
+                         probe_iterations=20000, rounds=3):
+    """
+    Benchmarks pbkdf2_hmac on this machine and returns the iteration count that takes about
+    target_latency seconds, rounded down to a multiple of 1000 and never below minimum.
+    """
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac(algorithm, b'calibration', b'\x00' * SALT_SIZE, probe_iterations)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    iterations = int(probe_iterations * target_latency / best) // 1000 * 1000
+    return max(minimum, iterations)
+
+class HashingService:
+    """
+    Runs PBKDF2 on a bounded worker pool. hashlib releases the GIL while hashing, so threads
+    give real parallelism. At most max_pending hashes are queued or running; beyond that callers
+    wait up to queue_timeout seconds for a slot and then get Overloaded.
+
+    With target_latency set, the iteration count is calibrated on startup instead of fixed.
+    Credentials hashed with an older algorithm or a lower count are rehashed on login.
+    """
+
+    def __init__(self, workers=None, max_pending=MAX_PENDING, queue_timeout=1.0,
+                 algorithm=ALGORITHM, iterations=ITERATIONS, target_latency=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.algorithm = algorithm
+        if target_latency is not None:
+            iterations = calibrate_iterations(target_latency, algorithm, minimum=iterations)
+        self.iterations = iterations
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pbkdf2')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_times = deque(maxlen=LATENCY_SAMPLES)
+        self._run_times = deque(maxlen=LATENCY_SAMPLES)
+        self._async_waiters = deque()  # (loop, future) of coroutines waiting for a free slot
+
+    # Work submission
+    def _release_slot(self):
+        self._slots.release()
+        self._wake_async_waiter()
+
+    def _wake_async_waiter(self):
+        # Hands a freed slot to the oldest coroutine still waiting, on its own event loop
+        with self._lock:
+            if not self._async_waiters:
+                return
+            loop, waiter = self._async_waiters.popleft()
+        loop.call_soon_threadsafe(self._set_waiter, waiter)
+
+    def _set_waiter(self, waiter):
+        if waiter.done():
+            self._wake_async_waiter()  # that waiter gave up; pass the wakeup on
+        else:
+            waiter.set_result(None)
+
+    def _run(self, func, args, enqueued):
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._wait_times.append(started - enqueued)
+                self._run_times.append(finished - started)
+            self._release_slot()
+
+    def _enqueue(self, func, args):
+        # Called holding a slot; _run gives it back, or _cancelled if the job never runs
+        with self._lock:
+            self._queued += 1
+        try:
+            future = self._executor.submit(self._run, func, args, time.perf_counter())
+        except BaseException:
+            self._cancelled(None)
+            raise
+        future.add_done_callback(lambda future: future.cancelled() and self._cancelled(future))
+        return future
+
+    def _cancelled(self, future):
+        with self._lock:
+            self._queued -= 1
+        self._release_slot()
+
+    def _reject(self):
+        with self._lock:
+            self._rejected += 1
+        raise Overloaded(f"More than {self.max_pending} password hashes are pending.")
+
+    def submit(self, func, *args):
+        """Queues func(*args) on the pool, blocking up to queue_timeout for a free slot."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._reject()
+        return self._enqueue(func, args)
+
+    async def submit_async(self, func, *args):
+        """Like submit, but waits for a slot without blocking the event loop; woken when a job finishes."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        while not self._slots.acquire(blocking=False):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self._reject()
+            waiter = loop.create_future()
+            entry = (loop, waiter)
+            with self._lock:
+                self._async_waiters.append(entry)
+            try:
+                # A slot freed before the waiter was registered would otherwise be missed
+                if self._slots.acquire(blocking=False):
+                    break
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # A wakeup already on its way to this waiter is passed on once it is cancelled
+                waiter.cancel()
+                with self._lock:
+                    if entry in self._async_waiters:
+                        self._async_waiters.remove(entry)
+        return await asyncio.wrap_future(self._enqueue(func, args))
+
+    # Hashing
+    def _hash(self, password, salt, algorithm, iterations):
+        return hashlib.pbkdf2_hmac(algorithm, password.encode(), salt, iterations)
+
+    def _hash_args(self, password, salt):
+        return password, salt or os.urandom(SALT_SIZE), self.algorithm, self.iterations
+
+    def _verify(self, password, credential):
+        salt, stored_hash, iterations, algorithm = credential
+        return hmac.compare_digest(self._hash(password, salt, algorithm, iterations), stored_hash)
+
+    def needs_rehash(self, credential):
+        """True when a credential was hashed with another algorithm or a clearly lower iteration count."""
+        return (credential.algorithm != self.algorithm
+                or credential.iterations < self.iterations * (1 - REHASH_TOLERANCE))
+
+    def _verify_and_rehash(self, password, credential):
+        if not self._verify(password, credential):
+            return False, None
+        if not self.needs_rehash(credential):
+            return True, None
+        salt = os.urandom(SALT_SIZE)
+        hashed = self._hash(password, salt, self.algorithm, self.iterations)
+        return True, Credential(salt, hashed, self.iterations, self.algorithm)
+
+    def hash_password_sync(self, password, salt=None):
+        args = self._hash_args(password, salt)
+        hashed = self.submit(self._hash, *args).result()
+        return Credential(args[1], hashed, self.iterations, self.algorithm)
+
+    def verify_password_sync(self, password, credential):
+        return self.submit(self._verify, password, credential).result()
+
+    def verify_and_rehash_sync(self, password, credential):
+        """
+        Verifies a password and upgrades outdated credentials in the same worker call.
+        Returns (valid, new_credential), where new_credential is None unless a rehash happened.
+        """
+        return self.submit(self._verify_and_rehash, password, credential).result()
+
+    async def hash_password(self, password, salt=None):
+        args = self._hash_args(password, salt)
+        hashed = await self.submit_async(self._hash, *args)
+        return Credential(args[1], hashed, self.iterations, self.algorithm)
+
+    async def verify_password(self, password, credential):
+        return await self.submit_async(self._verify, password, credential)
+
+    async def verify_and_rehash(self, password, credential):
+        return await self.submit_async(self._verify_and_rehash, password, credential)
+
+    # Metrics
+    def metrics(self):
+        """Queue depth, throughput counters and recent latencies in seconds."""
+        with self._lock:
+            wait_times = sorted(self._wait_times)
+            run_times = sorted(self._run_times)
+            return {
+                'queue_depth': self._queued,
+                'running': self._running,
+                'max_pending': self.max_pending,
+                'workers': self.workers,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'wait_p50': _percentile(wait_times, 50),
+                'wait_p99': _percentile(wait_times, 99),
+                'hash_p50': _percentile(run_times, 50),
+                'hash_p99': _percentile(run_times, 99),
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+_default_service = None
+_default_lock = threading.Lock()
+
+def default_service():
+    """Shared service used by the module-level helpers, created on first use."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = HashingService()
+        return _default_service
+
+async def hash_password(password, salt=None):
+    return await default_service().hash_password(password, salt)
+
+async def verify_password(password, credential):
+    return await default_service().verify_password(password, credential)
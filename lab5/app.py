@@ -1,10 +1,35 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+import os
+import sys
+from contextlib import ExitStack, contextmanager
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 import pymysql.cursors
 
-app = Flask(__name__)
+# The password policy library (lab3) is found from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from lab3.password_policy import get_policy
+from rate_limiter import LoginRateLimiter, USER_LIMIT, CLIENT_LIMIT, open_backend
+from db_pool import ConnectionPool
+from page_cache import PageCache
+from bulk_import import BATCH_SIZE, InvalidImport, import_students, open_text
+from instrumentation import Instrumentation
+
+# TEMPLATE_DIR overrides the template folder (the load test points it at loadtest_templates)
+app = Flask(__name__, template_folder=os.environ.get('TEMPLATE_DIR', 'templates'))
 app.secret_key = 'your_secret_key'  # Replace with a strong secret key
 
+# Per-route and per-phase latency histograms, served at /metrics. Set PROFILE_SLOW_MS to profile
+# requests (a PROFILE_SAMPLE_RATE fraction of them) and keep the profiles of the slow ones.
+# SERVER_TIMING=1 adds a Server-Timing header with the phase breakdown (for debugging only).
+PROFILE_SLOW_MS = os.environ.get('PROFILE_SLOW_MS')
+instrumentation = Instrumentation(
+    app,
+    profile_threshold=float(PROFILE_SLOW_MS) / 1000 if PROFILE_SLOW_MS else None,
+    profile_dir=os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', '1')),
+    server_timing=os.environ.get('SERVER_TIMING') == '1')
+phase = instrumentation.phase
+
 # MySQL DB configuration
 db_config = {
     'host': 'localhost',
@@ -15,6 +40,64 @@ db_config = {
     'cursorclass': pymysql.cursors.DictCursor
 }
 
+# Set SQLITE_DB to a file path to run against a local SQLite stand-in instead of MySQL
+SQLITE_DB = os.environ.get('SQLITE_DB')
+if SQLITE_DB:
+    import sqlite_standin
+    connect, db_dialect = (lambda: sqlite_standin.connect(SQLITE_DB)), 'sqlite'
+else:
+    connect, db_dialect = (lambda: pymysql.connect(**db_config)), 'mysql'
+
+# Connections are pooled and reused across requests; every route borrows one with
+# `with db_connection() as connection:`, which always hands it back.
+db_pool = ConnectionPool(connect,
+                         min_size=int(os.environ.get('DB_POOL_MIN', '1')),
+                         max_size=int(os.environ.get('DB_POOL_MAX', '10')))
+instrumentation.add_collector('db_pool', db_pool.metrics,
+                              counters=('created', 'closed', 'checkouts', 'waits', 'timeouts', 'failed_checks',
+                                        'wait_time'))
+
+@contextmanager
+def db_connection():
+    # A pooled connection, timing the checkout and the work done with it as separate phases
+    with ExitStack() as stack:
+        with phase('db_connect'):
+            connection = stack.enter_context(db_pool.connection())
+        with phase('db_query'):
+            yield connection
+
+# Listings are paged by key (WHERE key > last key on the previous page ORDER BY key), so a page
+# costs the same however deep it is. Rendered pages are cached for PAGE_CACHE_TTL seconds and
+# dropped as soon as the table they show is written to.
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', '50'))
+page_cache = PageCache(ttl=float(os.environ.get('PAGE_CACHE_TTL', '30')))
+instrumentation.add_collector('page_cache', lambda: {'hits': page_cache.hits, 'misses': page_cache.misses,
+                                                     'entries': len(page_cache)},
+                              counters=('hits', 'misses'))
+
+def cached_page(key, render):
+    # Pages with flash messages waiting are rendered fresh, as the messages are shown only once
+    if '_flashes' in session:
+        return render()
+    return page_cache.get_or_render(key, render)
+
+def next_cursor(rows, key):
+    # Listings fetch PAGE_SIZE + 1 rows; the extra row only tells whether another page follows
+    return rows[PAGE_SIZE - 1][key] if len(rows) > PAGE_SIZE else None
+
+# Password policy for new accounts, compiled once and reused on every request
+registration_policy = get_policy()
+
+# Login attempts are limited per username and per client address before any password hashing
+# (LOGIN_LIMIT_PER_USER / LOGIN_LIMIT_PER_CLIENT attempts a minute). Set RATE_LIMIT_REDIS_URL to
+# share the limits between worker processes.
+login_limiter = LoginRateLimiter(
+    open_backend(os.environ.get('RATE_LIMIT_REDIS_URL')),
+    user_limit=(int(os.environ.get('LOGIN_LIMIT_PER_USER', USER_LIMIT[0])), USER_LIMIT[1]),
+    client_limit=(int(os.environ.get('LOGIN_LIMIT_PER_CLIENT', CLIENT_LIMIT[0])), CLIENT_LIMIT[1]))
+instrumentation.add_collector('login_limiter', lambda: {'rejected': login_limiter.rejected},
+                              counters=('rejected',))
+
 # Decorator to require login
 def login_required(f):
     from functools import wraps
@@ -49,17 +132,20 @@ def register():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        hashed_password = generate_password_hash(password)
-        connection = pymysql.connect(**db_config)
-        try:
+        status, reason = registration_policy.validate(password)
+        if status != 'valid':
+            flash("Weak password: " + reason)
+            return redirect(url_for('register'))
+        with phase('hash'):
+            hashed_password = generate_password_hash(password)
+        with db_connection() as connection:
             with connection.cursor() as cursor:
                 sql = "INSERT INTO users (username, password, role) VALUES (%s, %s, %s)"
                 cursor.execute(sql, (username, hashed_password, 'viewer'))
             connection.commit()
-            flash("Registration successful. Please login.")
-            return redirect(url_for('login'))
-        finally:
-            connection.close()
+        page_cache.invalidate('users')
+        flash("Registration successful. Please login.")
+        return redirect(url_for('login'))
     return render_template('register.html')
 
 # Login route with password verification.
@@ -68,22 +154,26 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        connection = pymysql.connect(**db_config)
-        try:
+        if not login_limiter.allow(username, request.remote_addr):
+            flash("Too many login attempts. Please try again later.")
+            return redirect(url_for('login'))
+        with db_connection() as connection:
             with connection.cursor() as cursor:
                 sql = "SELECT * FROM users WHERE username = %s"
                 cursor.execute(sql, (username,))
                 user = cursor.fetchone()
-            if user and check_password_hash(user['password'], password):
-                session['user_id'] = user['id']
-                session['user_role'] = user['role']
-                flash("Logged in successfully!")
-                return redirect(url_for('dashboard'))
-            else:
-                flash("Invalid credentials.")
-                return redirect(url_for('login'))
-        finally:
-            connection.close()
+        # The connection is back in the pool before the slow password hash check
+        with phase('hash'):
+            valid = user is not None and check_password_hash(user['password'], password)
+        if valid:
+            login_limiter.succeeded(username)
+            session['user_id'] = user['id']
+            session['user_role'] = user['role']
+            flash("Logged in successfully!")
+            return redirect(url_for('dashboard'))
+        else:
+            flash("Invalid credentials.")
+            return redirect(url_for('login'))
     return render_template('login.html')
 
 @app.route('/logout')
@@ -103,34 +193,33 @@ def dashboard():
 @login_required
 @roles_required('admin')
 def admin_panel():
-    connection = pymysql.connect(**db_config)
     if request.method == 'POST':
         user_id = request.form['user_id']
         role = request.form['role']
-        try:
+        with db_connection() as connection:
             with connection.cursor() as cursor:
                 sql = "UPDATE users SET role = %s WHERE id = %s"
                 cursor.execute(sql, (role, user_id))
             connection.commit()
-            flash("User role updated successfully.")
-        finally:
-            connection.close()
+        page_cache.invalidate('users')
+        flash("User role updated successfully.")
         return redirect(url_for('admin_panel'))
     else:
-        try:
-            with connection.cursor() as cursor:
-                sql = "SELECT id, username, role FROM users"
-                cursor.execute(sql)
-                users = cursor.fetchall()
-        finally:
-            connection.close()
-        return render_template('admin_panel.html', users=users)
+        after = request.args.get('after', 0, type=int)
+        def render():
+            with db_connection() as connection:
+                with connection.cursor() as cursor:
+                    sql = "SELECT id, username, role FROM users WHERE id > %s ORDER BY id LIMIT %s"
+                    cursor.execute(sql, (after, PAGE_SIZE + 1))
+                    users = cursor.fetchall()
+            return render_template('admin_panel.html', users=users[:PAGE_SIZE],
+                                   next_after=next_cursor(users, 'id'))
+        return cached_page(('users', after), render)
 
 # stud_info route for viewing/updating student records.
 @app.route('/stud_info', methods=['GET','POST'])
 @login_required
 def stud_info():
-    connection = pymysql.connect(**db_config)
     if request.method == 'POST':
         # Only admin and editor roles can update records.
         if session['user_role'] not in ['admin', 'editor']:
@@ -141,24 +230,47 @@ def stud_info():
         age = request.form['age']
         branch = request.form['branch']
         hometown = request.form['hometown']
-        try:
+        with db_connection() as connection:
             with connection.cursor() as cursor:
                 sql = "UPDATE stud_info SET name=%s, age=%s, branch=%s, hometown=%s WHERE roll=%s"
                 cursor.execute(sql, (name, age, branch, hometown, roll))
             connection.commit()
-            flash("Record updated successfully.")
-        finally:
-            connection.close()
+        page_cache.invalidate('stud_info')
+        flash("Record updated successfully.")
         return redirect(url_for('stud_info'))
     else:
-        try:
-            with connection.cursor() as cursor:
-                sql = "SELECT * FROM stud_info"
-                cursor.execute(sql)
-                records = cursor.fetchall()
-        finally:
-            connection.close()
-        return render_template('stud_info.html', records=records, role=session.get('user_role'))
+        after = request.args.get('after', '')
+        role = session.get('user_role')
+        def render():
+            with db_connection() as connection:
+                with connection.cursor() as cursor:
+                    sql = ("SELECT roll, name, age, branch, hometown FROM stud_info "
+                           "WHERE roll > %s ORDER BY roll LIMIT %s")
+                    cursor.execute(sql, (after, PAGE_SIZE + 1))
+                    records = cursor.fetchall()
+            return render_template('stud_info.html', records=records[:PAGE_SIZE], role=role,
+                                   next_after=next_cursor(records, 'roll'))
+        return cached_page(('stud_info', role, after), render)
+
+# Bulk import/update of student records from an uploaded CSV (form fields: file, mode, batch_size).
+# The upload is streamed and written in batches; the response is the import report as JSON.
+@app.route('/stud_info/import', methods=['POST'])
+@login_required
+@roles_required('admin', 'editor')
+def stud_info_import():
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify(error="No CSV file was uploaded."), 400
+    batch_size = request.form.get('batch_size', BATCH_SIZE, type=int)
+    mode = request.form.get('mode', 'upsert')
+    try:
+        with db_connection() as connection:
+            report = import_students(connection, open_text(upload.stream), batch_size, mode, db_dialect)
+    except InvalidImport as error:
+        return jsonify(error=str(error)), 400
+    finally:
+        page_cache.invalidate('stud_info')
+    return jsonify(report.as_dict())
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,246 @@
+import argparse
+import csv
+import io
+import sys
+import time
+
+# Bulk import of student records
+# The CSV is read one row at a time and each row is validated as it arrives. Valid rows are
+# written in batches with one executemany and one commit per batch (pymysql turns a batched
+# INSERT into a single multi-row statement). Nothing holds more than one batch in memory.
+#
+#   roll,name,age,branch,hometown
+#   2101CS44,Jayanth,21,CSE,Vizag
+FIELDS = ('roll', 'name', 'age', 'branch', 'hometown')
+BATCH_SIZE = 500
+MAX_BATCH_SIZE = 10000
+MAX_ERRORS = 1000  # row errors listed in a report; later ones are only counted
+
+# "upsert" inserts new rolls and updates existing ones, "update" only changes existing rows
+STATEMENTS = {
+    'mysql': {
+        'upsert': "INSERT INTO stud_info (roll, name, age, branch, hometown) VALUES (%s, %s, %s, %s, %s) "
+                  "ON DUPLICATE KEY UPDATE name=VALUES(name), age=VALUES(age), branch=VALUES(branch), "
+                  "hometown=VALUES(hometown)",
+        'update': "UPDATE stud_info SET name=%s, age=%s, branch=%s, hometown=%s WHERE roll=%s",
+    },
+    'sqlite': {
+        'upsert': "INSERT INTO stud_info (roll, name, age, branch, hometown) VALUES (?, ?, ?, ?, ?) "
+                  "ON CONFLICT(roll) DO UPDATE SET name=excluded.name, age=excluded.age, "
+                  "branch=excluded.branch, hometown=excluded.hometown",
+        'update': "UPDATE stud_info SET name=?, age=?, branch=?, hometown=? WHERE roll=?",
+    },
+}
+
+PLACEHOLDERS = {'mysql': '%s', 'sqlite': '?'}
+
+class InvalidImport(ValueError):
+    """Raised when the file cannot be imported at all (bad header, unknown mode)."""
+
+def validate_row(row):
+    """Returns (roll, name, age, branch, hometown) for a CSV row, or raises ValueError."""
+    values = {field: (row.get(field) or '').strip() for field in FIELDS}
+    if any('\ufffd' in value for value in values.values()):
+        raise ValueError("Row is not valid UTF-8")
+    for field in ('roll', 'name', 'branch', 'hometown'):
+        if not values[field]:
+            raise ValueError(f"Missing {field}")
+    try:
+        age = int(values['age'])
+    except ValueError:
+        raise ValueError(f"Age '{values['age']}' is not a number") from None
+    if not 0 < age < 150:
+        raise ValueError(f"Age {age} is out of range")
+    return values['roll'], values['name'], age, values['branch'], values['hometown']
+
+def read_rows(stream):
+    """
+    Yields (line number, values, error) for each data row of a CSV text stream. Rows the CSV
+    parser rejects are reported as errors like invalid rows, so earlier batches stay consistent
+    with the report instead of the import stopping halfway.
+    """
+    reader = csv.DictReader(stream)
+    try:
+        fieldnames = reader.fieldnames or ()
+    except (csv.Error, UnicodeDecodeError) as error:
+        raise InvalidImport(f"The CSV header cannot be read: {error}") from None
+    missing = [field for field in FIELDS if field not in fieldnames]
+    if missing:
+        raise InvalidImport(f"The CSV header is missing: {', '.join(missing)}")
+    while True:
+        previous_line = reader.line_num
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (csv.Error, UnicodeDecodeError) as error:
+            # line_num is not always advanced when the parser gives up on a record
+            yield max(reader.line_num, previous_line + 1), None, f"Malformed CSV: {error}"
+            continue
+        try:
+            yield reader.line_num, validate_row(row), None
+        except ValueError as error:
+            yield reader.line_num, None, str(error)
+
+class ImportReport:
+    """Row counts, per-batch timings and row-level errors of one import."""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.batches = []  # {'rows', 'seconds', 'rows_per_second'} per committed batch
+        self.errors = []  # (line number, message), at most MAX_ERRORS
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'seconds': self.seconds,
+            'rows_per_second': self.imported / self.seconds if self.seconds else None,
+            'batches': self.batches,
+            'errors': [{'line': line, 'error': message} for line, message in self.errors],
+        }
+
+def _row_params(mode, values):
+    # The UPDATE statement takes the roll last
+    return values[1:] + values[:1] if mode == 'update' else values
+
+def _missing_rolls(cursor, dialect, rolls):
+    # Rolls from an update batch that match no student
+    placeholders = ", ".join([PLACEHOLDERS[dialect]] * len(rolls))
+    cursor.execute(f"SELECT roll FROM stud_info WHERE roll IN ({placeholders})", list(rolls))
+    found = {row['roll'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+    return set(rolls) - found
+
+def _write_batch(connection, sql, mode, dialect, batch, report):
+    # One executemany and commit for the whole batch; if the database rejects it, the rows are
+    # retried one by one so the report can name the rows at fault. An update that affects fewer
+    # rows than it was given is checked for rolls that do not exist, which are row errors.
+    cursor = connection.cursor()
+    try:
+        try:
+            cursor.executemany(sql, [_row_params(mode, values) for _, values in batch])
+            missing = set()
+            if mode == 'update' and cursor.rowcount < len(batch):
+                # MySQL counts changed rather than matched rows, so a short count is only a hint
+                missing = _missing_rolls(cursor, dialect, {values[0] for _, values in batch})
+            connection.commit()
+            for line, values in batch:
+                if values[0] in missing:
+                    report.error(line, f"No student with roll {values[0]}")
+                else:
+                    report.imported += 1
+            return
+        except Exception:
+            connection.rollback()
+        for line, values in batch:
+            try:
+                cursor.execute(sql, _row_params(mode, values))
+                if mode == 'update' and not cursor.rowcount and _missing_rolls(cursor, dialect, [values[0]]):
+                    connection.rollback()
+                    report.error(line, f"No student with roll {values[0]}")
+                    continue
+                connection.commit()
+                report.imported += 1
+            except Exception as error:
+                connection.rollback()
+                report.error(line, str(error))
+    finally:
+        cursor.close()
+
+def import_students(connection, stream, batch_size=BATCH_SIZE, mode='upsert', dialect='mysql', on_batch=None):
+    """
+    Imports student rows from a CSV text stream over a DB-API connection and returns an
+    ImportReport. on_batch, if given, is called with each batch's timing dict as it commits.
+    """
+    if mode not in STATEMENTS[dialect]:
+        raise InvalidImport(f"Unknown import mode '{mode}'.")
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise InvalidImport(f"The batch size must be between 1 and {MAX_BATCH_SIZE}.")
+    sql = STATEMENTS[dialect][mode]
+    report = ImportReport()
+    batch = []
+
+    def flush():
+        started = time.perf_counter()
+        _write_batch(connection, sql, mode, dialect, batch, report)
+        seconds = time.perf_counter() - started
+        timing = {'rows': len(batch), 'seconds': seconds,
+                  'rows_per_second': len(batch) / seconds if seconds else None}
+        report.batches.append(timing)
+        if on_batch is not None:
+            on_batch(timing)
+        batch.clear()
+
+    for line, values, error in read_rows(stream):
+        report.rows += 1
+        if error is not None:
+            report.error(line, error)
+            continue
+        batch.append((line, values))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    report.seconds = time.perf_counter() - report.started
+    return report
+
+def open_text(binary_stream):
+    """
+    Wraps an uploaded file's binary stream for the CSV reader without reading it into memory.
+    Bytes that are not UTF-8 decode to U+FFFD, which validate_row reports as a row error.
+    """
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', errors='replace', newline='')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import or update student records from a CSV file.")
+    parser.add_argument("csv", help="CSV file with the columns " + ",".join(FIELDS))
+    parser.add_argument("-b", "--batch-size", type=int, default=BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("-m", "--mode", choices=("upsert", "update"), default="upsert")
+    parser.add_argument("--sqlite", metavar="PATH", help="import into a SQLite database instead of MySQL")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="your_database")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        import sqlite3
+        connection, dialect = sqlite3.connect(args.sqlite), 'sqlite'
+    else:
+        import pymysql
+        connection = pymysql.connect(host=args.host, user=args.user, password=args.password,
+                                     db=args.database, charset='utf8mb4')
+        dialect = 'mysql'
+
+    def print_batch(timing):
+        rate = timing['rows_per_second']
+        print(f"batch of {timing['rows']} rows in {timing['seconds'] * 1000:.1f} ms"
+              + (f" ({rate:.0f} rows/s)" if rate else ""))
+
+    try:
+        with open(args.csv, 'rb') as binary_file, open_text(binary_file) as file:
+            report = import_students(connection, file, args.batch_size, args.mode, dialect, print_batch)
+    except InvalidImport as error:
+        print(error, file=sys.stderr)
+        return 2
+    finally:
+        connection.close()
+
+    for line, message in report.errors:
+        print(f"line {line}: {message}", file=sys.stderr)
+    print(f"{report.imported} of {report.rows} rows imported, {report.failed} failed, "
+          f"in {report.seconds:.2f} s")
+    return 1 if report.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Database connection pool
+# Connections come from a zero-argument factory (pymysql.connect with the app's config, or
+# sqlite3.connect for a local stand-in) and are reused across requests instead of paying a TCP
+# and auth handshake on every page hit.
+MIN_SIZE = 1
+MAX_SIZE = 10
+IDLE_TIMEOUT = 300  # idle connections above min_size are closed after this many seconds
+PING_INTERVAL = 1.0  # connections idle for longer than this are checked before reuse
+CHECKOUT_TIMEOUT = 5.0
+
+class PoolTimeout(RuntimeError):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+def ping(connection):
+    """Default health check: a round trip that works for any DB-API connection."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+class ConnectionPool:
+    """
+    Thread-safe pool holding between min_size and max_size connections. The most recently used
+    idle connection is handed out first, so surplus ones go idle and are closed after idle_timeout,
+    at the next checkout or checkin (there is no background thread, so an unused pool keeps them).
+    A connection idle for longer than ping_interval is health-checked on checkout and replaced
+    when the check fails. When max_size connections are in use, callers wait up to
+    checkout_timeout seconds and then get PoolTimeout.
+    """
+
+    def __init__(self, connect, min_size=MIN_SIZE, max_size=MAX_SIZE, idle_timeout=IDLE_TIMEOUT,
+                 ping_interval=PING_INTERVAL, checkout_timeout=CHECKOUT_TIMEOUT, health_check=ping):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+        self._idle = deque()  # (connection, time it was returned), most recently returned last
+        self._size = 0
+        self._closed = False
+        self._available = threading.Condition(threading.Lock())
+        self._stats = {'created': 0, 'closed': 0, 'checkouts': 0, 'waits': 0, 'timeouts': 0,
+                       'failed_checks': 0, 'wait_time': 0.0}
+
+    # Opening and closing connections
+    def _open(self):
+        # Called with a size slot already reserved; gives the slot back if connecting fails
+        try:
+            connection = self._connect()
+        except Exception:
+            with self._available:
+                self._size -= 1
+                self._available.notify()
+            raise
+        with self._available:
+            self._stats['created'] += 1
+        return connection
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._available:
+            self._size -= 1
+            self._stats['closed'] += 1
+            self._available.notify()
+
+    def _expired(self, now):
+        # Oldest idle connections beyond min_size; called with the lock held
+        expired = []
+        while self._idle and self._size - len(expired) > self.min_size:
+            connection, returned = self._idle[0]
+            if now - returned < self.idle_timeout:
+                break
+            self._idle.popleft()
+            expired.append(connection)
+        return expired
+
+    def warm_up(self):
+        """Opens connections until min_size exist."""
+        while True:
+            with self._available:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            connection = self._open()
+            self._checkin(connection)
+
+    # Checkout and checkin
+    def _checkout(self):
+        with self._available:
+            expired = self._expired(time.monotonic())
+        for old in expired:
+            self._discard(old)
+
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        started = time.perf_counter()
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("The connection pool is closed.")
+                if self._idle:
+                    connection, returned = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    connection, returned = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"All {self.max_size} database connections are in use.")
+                waited = True
+                self._available.wait(remaining)
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_time'] += time.perf_counter() - started
+
+        if connection is None:
+            return self._open()
+        if time.monotonic() - returned > self.ping_interval:
+            try:
+                self.health_check(connection)
+            except Exception:
+                with self._available:
+                    self._stats['failed_checks'] += 1
+                    self._size += 1  # reserve a slot for the replacement before freeing this one
+                self._discard(connection)
+                return self._open()
+        return connection
+
+    def _checkin(self, connection):
+        now = time.monotonic()
+        with self._available:
+            if self._closed:
+                expired = [connection]
+            else:
+                self._idle.append((connection, now))
+                expired = self._expired(now)
+                self._available.notify()
+        for old in expired:
+            self._discard(old)
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks a connection out for the duration of a with block. Any open transaction is
+        rolled back when the connection comes back, so the next user starts clean; call
+        commit() inside the block to keep changes. Connections that fail to roll back are closed.
+        """
+        connection = self._checkout()
+        try:
+            yield connection
+        finally:
+            try:
+                connection.rollback()
+            except Exception:
+                self._discard(connection)
+            else:
+                self._checkin(connection)
+
+    # Metrics
+    def metrics(self):
+        """Pool size, connections in use and idle, and checkout counters (wait_time in seconds)."""
+        with self._available:
+            return dict(self._stats, size=self._size, idle=len(self._idle),
+                        in_use=self._size - len(self._idle), min_size=self.min_size,
+                        max_size=self.max_size)
+
+    def close(self):
+        """Closes the idle connections; connections still checked out are closed when returned."""
+        with self._available:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._available.notify_all()
+        for connection in idle:
+            self._discard(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,232 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request, before_render_template, template_rendered
+
+# Request instrumentation
+# Every request is timed as a whole and split into phases (pool checkout, queries, password
+# hashing, template rendering) with the `phase` context manager. Timings go into log-linear
+# histograms and are exposed at /metrics in the Prometheus text format. With server_timing on,
+# responses also carry a Server-Timing header with the phases that reveal nothing about the
+# account, so never the password hashing time.
+SUB_BUCKETS = 16  # linear buckets per power of two: about 6% worst-case relative error
+QUANTILES = (0.5, 0.9, 0.99)
+METRIC_PREFIX = 'lab5'
+PRIVATE_PHASES = frozenset({'hash'})  # left out of Server-Timing: unknown users skip hashing
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations with microsecond resolution. Below 2 * SUB_BUCKETS us every
+    value has its own bucket; above, each power of two is split into SUB_BUCKETS equal buckets,
+    so memory stays a few hundred counters however many values are recorded.
+    """
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0.0  # seconds
+
+    @staticmethod
+    def _index(micros):
+        if micros < 2 * SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - SUB_BUCKETS.bit_length()
+        return (shift + 1) * SUB_BUCKETS + (micros >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def _midpoint(index):
+        # Middle of the value range covered by a bucket, in microseconds
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        low = (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, seconds):
+        index = self._index(max(0, int(seconds * 1e6)))
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1) in seconds, or None when nothing was recorded."""
+        if not self.count:
+            return None
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._midpoint(index) / 1e6
+        return self._midpoint(len(self.counts) - 1) / 1e6
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Instrumentation:
+    """
+    Flask extension recording per-route and per-phase latencies and serving them at /metrics.
+
+    Profiling is off unless profile_threshold (seconds) is set. Then a sample_rate fraction of
+    requests runs under cProfile, one at a time, and those slower than the threshold are dumped
+    as .prof files into profile_dir (viewable with snakeviz, or as a flame graph with flameprof).
+    """
+
+    def __init__(self, app=None, profile_threshold=None, profile_dir='profiles', sample_rate=1.0,
+                 server_timing=False):
+        self.server_timing = server_timing
+        self.profile_threshold = profile_threshold
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self._requests = {}  # route -> LatencyHistogram
+        self._phases = {}  # (route, phase) -> LatencyHistogram
+        self._statuses = {}  # (route, status) -> count
+        self._collectors = {}  # name -> (callable returning {metric: number}, keys that are counters)
+        self._lock = threading.Lock()
+        self._profiler_lock = threading.Lock()  # cProfile allows one active profiler at a time
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        app.extensions['instrumentation'] = self
+
+    def add_collector(self, name, collect, counters=()):
+        """
+        Exports the numbers returned by collect() as <prefix>_<name>_<key>. Keys listed in
+        counters only ever grow and are exported as counters (with a _total suffix), the rest
+        as gauges.
+        """
+        self._collectors[name] = (collect, frozenset(counters))
+
+    # Recording
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = LatencyHistogram()
+        return histogram
+
+    def record_phase(self, name, seconds):
+        route = _route() if has_request_context() else '-'
+        with self._lock:
+            self._histogram(self._phases, (route, name)).record(seconds)
+        if has_request_context():
+            phases = g.setdefault('phase_times', {})
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Times the body of a with block as phase `name` of the current request."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - start)
+
+    def _before_render(self, sender, template, context, **extra):
+        g.setdefault('render_starts', []).append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        starts = g.get('render_starts')
+        if starts:
+            self.record_phase('render', time.perf_counter() - starts.pop())
+
+    # Request hooks
+    def _before_request(self):
+        g.request_start = time.perf_counter()
+        if (self.profile_threshold is not None and random.random() < self.sample_rate
+                and self._profiler_lock.acquire(blocking=False)):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def _after_request(self, response):
+        g.status = response.status_code
+        phases = g.get('phase_times')
+        if self.server_timing and phases:
+            timings = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items()
+                       if name not in PRIVATE_PHASES]
+            if timings:
+                response.headers['Server-Timing'] = ", ".join(timings)
+        return response
+
+    def _teardown_request(self, exc):
+        start = g.pop('request_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        route = _route()
+        status = g.get('status', 500)
+        with self._lock:
+            self._histogram(self._requests, route).record(elapsed)
+            self._statuses[(route, status)] = self._statuses.get((route, status), 0) + 1
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._profiler_lock.release()
+            if elapsed >= self.profile_threshold:
+                self._dump_profile(profiler, route, elapsed)
+
+    def _dump_profile(self, profiler, route, elapsed):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{elapsed * 1000:.0f}ms.prof")
+        profiler.dump_stats(path)
+
+    # Export
+    def render_metrics(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            requests = sorted(self._requests.items())
+            phases = sorted(self._phases.items())
+            statuses = sorted(self._statuses.items())
+            self._summary(lines, 'request_duration_seconds', "Request latency by route.",
+                          [({'route': route}, histogram) for route, histogram in requests])
+            self._summary(lines, 'phase_duration_seconds', "Time spent in each phase of a request.",
+                          [({'route': route, 'phase': phase}, histogram) for (route, phase), histogram in phases])
+        lines.append(f"# HELP {METRIC_PREFIX}_requests_total Requests by route and status code.")
+        lines.append(f"# TYPE {METRIC_PREFIX}_requests_total counter")
+        for (route, status), count in statuses:
+            lines.append(f'{METRIC_PREFIX}_requests_total{{route="{_label(route)}",status="{status}"}} {count}')
+        for name, (collect, counters) in sorted(self._collectors.items()):
+            for key, value in sorted(collect().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    if key in counters:
+                        metric, kind = f"{METRIC_PREFIX}_{name}_{key}_total", "counter"
+                    else:
+                        metric, kind = f"{METRIC_PREFIX}_{name}_{key}", "gauge"
+                    lines.append(f"# TYPE {metric} {kind}")
+                    lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _summary(lines, name, help_text, series):
+        metric = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} summary")
+        for labels, histogram in series:
+            label_text = ",".join(f'{key}="{_label(value)}"' for key, value in labels.items())
+            for q in QUANTILES:
+                lines.append(f'{metric}{{{label_text},quantile="{q}"}} {histogram.quantile(q):.6f}')
+            lines.append(f"{metric}_sum{{{label_text}}} {histogram.total:.6f}")
+            lines.append(f"{metric}_count{{{label_text}}} {histogram.count}")
+
+    def metrics_view(self):
+        return Response(self.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+def _route():
+    # The URL rule, not the path, so /stud_info?after=... stays one series
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
@@ -0,0 +1,210 @@
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+# The shared benchmark harness lives at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import benchmark
+
+# Load test for the lab5 app
+# Each simulated session logs in once and then keeps loading /dashboard and a page of
+# /stud_info until the run ends. Every request is timed separately (redirects are not
+# followed), and the report gives throughput and latency percentiles per endpoint.
+#
+# With --spawn, a SQLite stand-in database is seeded and the app is started with serve.py,
+# so the whole run is local:  python loadtest.py --spawn --sessions 32 --workers 4 --threads 8
+SESSIONS = 16
+DURATION = 10.0  # seconds
+STUDENTS = 1000
+PASSWORD = 'LoadTest#2024'
+ENDPOINTS = ('/login', '/dashboard', '/stud_info')
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Minimal templates used with --spawn when the app's own templates folder is absent
+LOADTEST_TEMPLATES = os.path.join(HERE, 'loadtest_templates')
+
+def default_templates():
+    templates = os.path.join(HERE, 'templates')
+    return templates if os.path.isdir(templates) else LOADTEST_TEMPLATES
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None  # surfaces the 302 as an HTTPError with its status and Location
+
+class Session:
+    """One simulated user with its own cookie jar, recording (endpoint, status, seconds, ok) per request."""
+
+    def __init__(self, base_url, username, password, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect)
+        self.samples = []
+
+    def request(self, endpoint, path=None, data=None, redirect_to=None):
+        """
+        Returns (status, Location header); status 0 means the request did not complete. The
+        request succeeds with a 200, or with a redirect to redirect_to when that is given.
+        """
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base_url + (path or endpoint), body, timeout=self.timeout) as response:
+                response.read()
+                status, location = response.status, response.headers.get('Location', '')
+        except urllib.error.HTTPError as error:
+            error.read()
+            status, location = error.code, error.headers.get('Location', '')
+        except OSError:
+            status, location = 0, ''
+        if redirect_to is None:
+            ok = status == 200
+        else:
+            ok = status in (301, 302, 303) and location.rstrip('/').endswith(redirect_to)
+        self.samples.append((endpoint, status, time.perf_counter() - start, ok))
+        return status, location
+
+    def login(self):
+        # A rejected login (bad password or rate limited) also redirects, but back to /login
+        self.request('/login', data={'username': self.username, 'password': self.password}, redirect_to='/dashboard')
+        return self.samples[-1][3]
+
+    def run(self, deadline, students, think_time):
+        if not self.login():
+            return
+        while time.perf_counter() < deadline:
+            self.request('/dashboard')
+            # Start at a random roll so the keyset pages (and the page cache) are exercised
+            after = f"R{random.randrange(students):06d}" if students else ''
+            self.request('/stud_info', f"/stud_info?after={after}")
+            if think_time:
+                time.sleep(think_time)
+
+def summarize(samples, elapsed):
+    """One result record per endpoint plus a total, with throughput and latency percentiles in ms."""
+    groups = {endpoint: [] for endpoint in ENDPOINTS}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+    groups['total'] = samples
+    results = []
+    for endpoint, group in groups.items():
+        if not group:
+            continue
+        latencies = sorted(seconds * 1000 for _, _, seconds, _ in group)
+        record = {
+            'endpoint': endpoint,
+            'requests': len(group),
+            'errors': sum(not ok for _, _, _, ok in group),
+            'rps': len(group) / elapsed,
+        }
+        for pct in benchmark.PERCENTILES:
+            record[f'p{pct}_ms'] = benchmark.percentile(latencies, pct)
+        record['max_ms'] = latencies[-1]
+        results.append(record)
+    return results
+
+def run_load(base_url, sessions, duration, users, password=PASSWORD, students=STUDENTS, think_time=0.0):
+    """Runs `sessions` concurrent sessions for `duration` seconds and returns (samples, elapsed seconds)."""
+    deadline = time.perf_counter() + duration
+    clients = [Session(base_url, f"user{i % users}", password) for i in range(sessions)]
+    threads = [threading.Thread(target=client.run, args=(deadline, students, think_time)) for client in clients]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return [sample for client in clients for sample in client.samples], elapsed
+
+def _wait_for_port(host, port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited during startup.")
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"The server did not start listening on {host}:{port}.")
+
+def spawn_server(database, port, workers, threads, server='auto', templates=None):
+    """Starts serve.py against a SQLite stand-in database, with login rate limits lifted."""
+    env = dict(os.environ, SQLITE_DB=database, TEMPLATE_DIR=templates or default_templates(),
+               LOGIN_LIMIT_PER_USER='1000000', LOGIN_LIMIT_PER_CLIENT='1000000')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'serve.py'),
+         '--port', str(port), '--workers', str(workers), '--threads', str(threads), '--server', server],
+        env=env)
+    try:
+        _wait_for_port('127.0.0.1', port, process)
+    except Exception:
+        process.terminate()
+        process.wait()
+        raise
+    return process
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the lab5 app with concurrent simulated sessions.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of a running server")
+    parser.add_argument("-s", "--sessions", type=int, default=SESSIONS, help="concurrent sessions")
+    parser.add_argument("-d", "--duration", type=float, default=DURATION, help="seconds to run")
+    parser.add_argument("--users", type=int, default=None, help="distinct accounts (default: one per session)")
+    parser.add_argument("--password", default=PASSWORD, help="password of the user0, user1, ... accounts")
+    parser.add_argument("--students", type=int, default=STUDENTS, help="student rows in the stand-in database")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds each session pauses between page loads")
+    parser.add_argument("--spawn", action="store_true", help="seed a SQLite stand-in and start serve.py for the run")
+    parser.add_argument("--sqlite", metavar="PATH", help="stand-in database to seed (default: a temporary file)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="server workers with --spawn")
+    parser.add_argument("-t", "--threads", type=int, default=8, help="threads per server worker with --spawn")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "builtin"), default="auto", help="server with --spawn")
+    parser.add_argument("--templates", metavar="DIR",
+                        help="template folder for the spawned app (default: lab5/templates, else loadtest_templates)")
+    parser.add_argument("--json", help="write results to this JSON file")
+    parser.add_argument("--csv", help="write results to this CSV file")
+    args = parser.parse_args(argv)
+    users = args.users or args.sessions
+
+    process = None
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.spawn:
+            import sqlite_standin
+            database = args.sqlite or os.path.join(tmpdir, 'loadtest.db')
+            sqlite_standin.seed(database, users=users, students=args.students, password=args.password)
+            port = urllib.parse.urlsplit(args.url).port or 8000
+            process = spawn_server(database, port, args.workers, args.threads, args.server, args.templates)
+        try:
+            samples, elapsed = run_load(args.url, args.sessions, args.duration, users, args.password,
+                                        args.students, args.think_time)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if not samples:
+        print("No requests were completed.", file=sys.stderr)
+        return 1
+    results = summarize(samples, elapsed)
+    for record in results:
+        record.update(sessions=args.sessions, workers=args.workers if args.spawn else None,
+                      threads=args.threads if args.spawn else None)
+    print(f"{args.sessions} sessions for {elapsed:.1f} s against {args.url}")
+    benchmark.print_table(results, ['endpoint', 'requests', 'errors', 'rps', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+    if args.json:
+        benchmark.write_json(results, args.json)
+    if args.csv:
+        benchmark.write_csv(results, args.csv)
+    return 1 if any(record['errors'] for record in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
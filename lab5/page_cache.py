@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Read-through cache of rendered pages
+# Keys are tuples whose first item names the table the page was rendered from, so a write to
+# that table drops every cached page built from it. Each worker process has its own cache;
+# the TTL bounds how long a page can stay stale after a write made through another process.
+MAX_ENTRIES = 256
+TTL = 30.0  # seconds
+
+class PageCache:
+    """LRU cache of at most max_entries pages, each kept for at most ttl seconds."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._pages = OrderedDict()  # key -> (expiry time, page), least recently used first
+        self._generations = {}  # table -> number of invalidations so far
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._pages[key]
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, page, generation=None):
+        """Caches page; skipped when generation is given and key's table was invalidated since."""
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key[0], 0):
+                return
+            self._pages[key] = (self._clock() + self.ttl, page)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+
+    def get_or_render(self, key, render):
+        """Returns the cached page for key, or calls render() and caches its result."""
+        page = self.get(key)
+        if page is None:
+            # A write during render() invalidates the table, and the stale page is not cached
+            generation = self._generations.get(key[0], 0)
+            page = render()
+            self.put(key, page, generation)
+        return page
+
+    def invalidate(self, table):
+        """Drops every page rendered from table."""
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [key for key in self._pages if key[0] == table]:
+                del self._pages[key]
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def __len__(self):
+        return len(self._pages)
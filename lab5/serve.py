@@ -0,0 +1,188 @@
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+# Production serving mode
+# Runs the app in several preforked worker processes, each serving requests on a pool of
+# threads. gunicorn (gthread workers) is used when it is installed; otherwise a built-in
+# prefork server on the standard library takes its place. The app is imported once before
+# forking, so workers share its code pages; database connections are only opened in the
+# workers. Rate limits and page caches are per worker unless RATE_LIMIT_REDIS_URL is set.
+WORKERS = int(os.environ.get('WEB_WORKERS', os.cpu_count() or 1))
+THREADS = int(os.environ.get('WEB_THREADS', '8'))
+MIN_WORKER_LIFETIME = 5.0  # workers dying sooner than this are restarted with a growing delay
+MAX_RESTART_DELAY = 30.0
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass  # request timings are in /metrics; a log line per request only slows serving
+
+class ThreadPoolWSGIServer(WSGIServer):
+    """
+    WSGI server on an already listening socket, handling connections on `threads` threads.
+    A connection is only accepted once a thread is free, so a saturated worker leaves new
+    connections in the shared backlog for its idle siblings instead of queueing them itself.
+    """
+
+    def __init__(self, listener, app, threads):
+        super().__init__(listener.getsockname(), QuietHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listener
+        host, port = listener.getsockname()[:2]
+        self.server_name = socket.getfqdn(host)
+        self.server_port = port
+        self.setup_environ()
+        self.set_app(app)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self._free_threads = threading.BoundedSemaphore(threads)
+
+    def get_request(self):
+        # Raising OSError makes socketserver skip this round; serve_forever polls again
+        if not self._free_threads.acquire(timeout=0.5):
+            raise BlockingIOError("All worker threads are busy.")
+        try:
+            return super().get_request()
+        except BaseException:
+            self._free_threads.release()
+            raise
+
+    def shutdown_request(self, request):
+        # Called exactly once for every accepted connection, whether it was served or rejected
+        try:
+            super().shutdown_request(request)
+        finally:
+            self._free_threads.release()
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        self._executor.shutdown(wait=True)
+        super().server_close()
+
+def _run_worker(app_module, listener, threads):
+    server = ThreadPoolWSGIServer(listener, app_module.app, threads)
+    # shutdown() waits for serve_forever to return, so it has to be called from another thread
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        app_module.db_pool.warm_up()
+    except Exception as error:
+        print(f"[{os.getpid()}] Could not open the initial database connections: {error}", file=sys.stderr)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    finally:
+        server.server_close()
+        app_module.db_pool.close()
+
+def serve_builtin(app_module, host, port, workers, threads):
+    listener = socket.create_server((host, port), backlog=1024)
+    # Every worker polls the shared socket; whoever loses the race for a connection gets
+    # BlockingIOError, which socketserver ignores, instead of blocking in accept()
+    listener.setblocking(False)
+    if workers <= 1 or not hasattr(os, 'fork'):
+        _run_worker(app_module, listener, threads)
+        return
+
+    children = {}  # pid -> start time
+    stopping = False
+    restart_delay = 0.0
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master stops the workers on Ctrl+C
+            try:
+                _run_worker(app_module, listener, threads)
+            finally:
+                os._exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            os.kill(pid, signal.SIGTERM)
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if stopping or started is None:
+            continue
+        # Replace a worker that died, backing off while workers keep crashing at startup
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            restart_delay = min(MAX_RESTART_DELAY, restart_delay * 2 or 1.0)
+            print(f"Worker {pid} exited early; restarting in {restart_delay:.0f} s", file=sys.stderr)
+            deadline = time.monotonic() + restart_delay
+            while not stopping and time.monotonic() < deadline:
+                time.sleep(0.1)
+        else:
+            restart_delay = 0.0
+        if not stopping:
+            spawn()
+    listener.close()
+
+def serve_gunicorn(app_module, host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for name, value in {'bind': f'{host}:{port}', 'workers': workers, 'threads': threads,
+                                'worker_class': 'gthread', 'preload_app': True}.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return app_module.app
+
+    Application().run()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the lab5 app with several worker processes and threads.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8000)
+    parser.add_argument("-w", "--workers", type=int, default=WORKERS, help="worker processes")
+    parser.add_argument("-t", "--threads", type=int, default=THREADS, help="threads per worker")
+    parser.add_argument("--server", choices=("auto", "gunicorn", "builtin"), default="auto",
+                        help="WSGI server to use (auto prefers gunicorn when installed)")
+    args = parser.parse_args(argv)
+
+    server = args.server
+    if server == "auto":
+        try:
+            import gunicorn  # only checking that it is installed
+            server = "gunicorn"
+        except ImportError:
+            server = "builtin"
+
+    import app as app_module
+    print(f"Serving on http://{args.host}:{args.port} with {server}: "
+          f"{args.workers} workers x {args.threads} threads", flush=True)
+    if server == "gunicorn":
+        serve_gunicorn(app_module, args.host, args.port, args.workers, args.threads)
+    else:
+        serve_builtin(app_module, args.host, args.port, args.workers, args.threads)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import re
+import sqlite3
+
+from werkzeug.security import generate_password_hash
+
+# SQLite stand-in for the MySQL database
+# Wraps sqlite3 so the app's queries run unchanged: %s placeholders, cursors used as context
+# managers and rows returned as dictionaries, like pymysql with DictCursor. Used for local
+# runs and load tests when no MySQL/MariaDB server is available.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'viewer'
+);
+CREATE TABLE IF NOT EXISTS stud_info (
+    roll TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    age INTEGER,
+    branch TEXT,
+    hometown TEXT
+);
+"""
+
+_PLACEHOLDER = re.compile(r'%s')
+
+def _to_sqlite(sql):
+    return _PLACEHOLDER.sub('?', sql)
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+class Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_to_sqlite(sql), params)
+        return self._cursor.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(_to_sqlite(sql), seq_of_params)
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class Connection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self):
+        return Cursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+def connect(path):
+    """Opens the SQLite file at path, creating the app's tables if needed."""
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.row_factory = _dict_row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return Connection(connection)
+
+def seed(path, users=100, students=1000, password='LoadTest#2024', role='editor'):
+    """
+    Fills a stand-in database with `users` accounts named user0, user1, ... sharing one
+    password, and `students` student records. Existing rows with the same keys are replaced.
+    """
+    connection = connect(path)
+    try:
+        hashed_password = generate_password_hash(password)
+        cursor = connection.cursor()
+        cursor.executemany(
+            "INSERT INTO users (username, password, role) VALUES (%s, %s, %s) "
+            "ON CONFLICT(username) DO UPDATE SET password=excluded.password, role=excluded.role",
+            [(f"user{i}", hashed_password, role) for i in range(users)])
+        cursor.executemany(
+            "INSERT OR REPLACE INTO stud_info (roll, name, age, branch, hometown) VALUES (%s, %s, %s, %s, %s)",
+            [(f"R{i:06d}", f"Student {i}", 18 + i % 8, ('CSE', 'ECE', 'ME', 'CE')[i % 4], "Patna")
+             for i in range(students)])
+        connection.commit()
+    finally:
+        connection.close()
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Login rate limiting
+# Every attempt takes a token from a per-username and a per-client bucket before any password
+# hashing starts, so a credential-stuffing burst is turned away cheaply. A successful login
+# refills the username bucket, so only repeated failures keep counting.
+USER_LIMIT = (5, 60)  # attempts per window (seconds) for one username
+CLIENT_LIMIT = (20, 60)  # attempts per window (seconds) for one client address
+MAX_KEYS = 100000
+
+class MemoryBackend:
+    """
+    In-process token buckets. Each key holds two numbers; a bucket left alone for a full
+    window is full again, so it is evicted (oldest first) instead of kept around. Buckets are
+    kept in one ordered table per window, so each table is evicted by its own window.
+    """
+
+    def __init__(self, max_keys=MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._tables = {}  # window -> OrderedDict of key -> [tokens, last update], least recently updated first
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        for window, buckets in self._tables.items():
+            while buckets:
+                key, (tokens, updated) = next(iter(buckets.items()))
+                if now - updated < window:
+                    break
+                del buckets[key]
+        # Over the key limit, the least recently updated buckets of the largest table go first
+        while len(self) >= self.max_keys:
+            max(self._tables.values(), key=len).popitem(last=False)
+
+    def consume(self, key, capacity, window):
+        """Takes one token from key's bucket; returns False when the bucket is empty."""
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            buckets = self._tables.setdefault(window, OrderedDict())
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [float(capacity), now]
+            else:
+                tokens, updated = bucket
+                bucket[0] = min(capacity, tokens + (now - updated) * capacity / window)
+                bucket[1] = now
+                buckets.move_to_end(key)
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+    def reset(self, key, window):
+        with self._lock:
+            self._tables.get(window, {}).pop(key, None)
+
+    def __len__(self):
+        return sum(len(buckets) for buckets in self._tables.values())
+
+class RedisBackend:
+    """
+    Fixed-window counters in a Redis-compatible server, so several worker processes share
+    one limit. client needs incr / expire / delete (redis-py or any compatible stand-in).
+    """
+
+    def __init__(self, client, prefix='ratelimit:', clock=time.time):
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+
+    def _window_key(self, key, window):
+        return f"{self.prefix}{key}:{int(self._clock() // window)}"
+
+    def consume(self, key, capacity, window):
+        window_key = self._window_key(key, window)
+        count = self.client.incr(window_key)
+        if count == 1:
+            self.client.expire(window_key, int(window) + 1)
+        return count <= capacity
+
+    def reset(self, key, window):
+        self.client.delete(self._window_key(key, window))
+
+def open_backend(url=None):
+    """MemoryBackend when url is empty, otherwise a RedisBackend for a redis:// URL."""
+    if not url:
+        return MemoryBackend()
+    import redis  # optional dependency, only needed for a shared backend
+    return RedisBackend(redis.Redis.from_url(url))
+
+class LoginRateLimiter:
+    """Per-username and per-client login limits on top of a pluggable backend."""
+
+    def __init__(self, backend=None, user_limit=USER_LIMIT, client_limit=CLIENT_LIMIT):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.user_limit = user_limit
+        self.client_limit = client_limit
+        self.rejected = 0
+
+    def allow(self, username, client):
+        """Call before hashing; False means the attempt must be rejected without checking the password."""
+        allowed = (self.backend.consume(f"client:{client}", *self.client_limit)
+                   and self.backend.consume(f"user:{username}", *self.user_limit))
+        if not allowed:
+            self.rejected += 1
+        return allowed
+
+    def succeeded(self, username):
+        """Call after a successful login so earlier failures stop counting against the user."""
+        self.backend.reset(f"user:{username}", self.user_limit[1])